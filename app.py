@@ -2,12 +2,38 @@
 import streamlit as st
 import json
 import os
+import threading
+import uuid
+from cache import profile_key
+from instrumentation import logger
+from models import RESOURCE_TYPES, Resources, Roadmap
+from prefetch import Prefetcher
 from roadmap_generator import RoadmapGenerator
+from store import RoadmapStore
+from views import (
+    checkpoint_key, insights_markdown, milestone_fragment, milestone_markdown, render_roadmap, resources_markdown
+)
+
+GOAL_TYPES = [
+    "python_programming",
+    "web_development",
+    "data_science",
+    "machine_learning",
+    "business_development",
+    "product_management"
+]
 
 # Initialize OpenAI client
 @st.cache_resource
 def init_generator():
-    return RoadmapGenerator(api_key=st.secrets["OPENAI_API_KEY"])
+    generator = RoadmapGenerator(api_key=st.secrets["OPENAI_API_KEY"])
+    # Fill the questions cache in the background so "Next" never waits on the API
+    threading.Thread(target=generator.warm_up, args=(GOAL_TYPES,), daemon=True).start()
+    return generator
+
+@st.cache_resource
+def init_store():
+    return RoadmapStore()
 
 # Page configuration
 st.set_page_config(
@@ -26,7 +52,54 @@ def safe_get(dictionary, *keys, default=None):
     except (KeyError, TypeError, IndexError):
         return default
 
-# Initialize session state
+store = init_store()
+
+# The user id lives in the URL, so a refresh or a restarted worker finds the same saved session
+user_id = st.query_params.get("user")
+if not user_id:
+    user_id = st.query_params["user"] = uuid.uuid4().hex
+
+def save_session():
+    store.save_session(
+        user_id,
+        st.session_state.current_step,
+        goal_type=st.session_state.user_responses.get('goal_type'),
+        responses=st.session_state.user_responses,
+        questions=st.session_state.onboarding_questions,
+        profile_hash=st.session_state.profile_hash
+    )
+
+def restore_session():
+    saved = store.load_session(user_id)
+    if saved is None:
+        return
+    st.session_state.current_step = saved['step']
+    st.session_state.user_responses = saved['responses']
+    st.session_state.onboarding_questions = saved['questions']
+    st.session_state.profile_hash = saved['profile_hash']
+    if saved['profile_hash']:
+        roadmap = store.roadmap(saved['profile_hash'])
+        if roadmap is not None:
+            st.session_state.roadmap = Roadmap.from_dict(roadmap)
+        for (number, checkpoint), done in store.checkpoints(user_id, saved['profile_hash']).items():
+            st.session_state[checkpoint_key(number, checkpoint)] = done
+
+def keep_roadmap(roadmap):
+    st.session_state.roadmap = roadmap
+    st.session_state.roadmap_responses = dict(st.session_state.user_responses)
+    store.save_roadmap(
+        st.session_state.profile_hash, st.session_state.user_responses['goal_type'], roadmap.to_dict()
+    )
+
+def save_checkpoint(number, checkpoint):
+    store.set_checkpoint(
+        user_id, st.session_state.profile_hash, number, checkpoint,
+        st.session_state[checkpoint_key(number, checkpoint)]
+    )
+
+# Initialize session state, rehydrating it from the store on a new browser session
+if 'current_step' not in st.session_state:
+    restore_session()
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 'goal_selection'
 if 'user_responses' not in st.session_state:
@@ -35,9 +108,18 @@ if 'onboarding_questions' not in st.session_state:
     st.session_state.onboarding_questions = None
 if 'roadmap' not in st.session_state:
     st.session_state.roadmap = None
+if 'profile_hash' not in st.session_state:
+    st.session_state.profile_hash = None
+if 'roadmap_responses' not in st.session_state:
+    st.session_state.roadmap_responses = dict(st.session_state.user_responses) if st.session_state.roadmap else None
+if 'regenerate_from' not in st.session_state:
+    st.session_state.regenerate_from = None
 
 # Initialize generator
 generator = init_generator()
+if 'prefetcher' not in st.session_state:
+    st.session_state.prefetcher = Prefetcher(generator)
+prefetcher = st.session_state.prefetcher
 
 # Title
 st.title("🎯 Learning Roadmap Generator")
@@ -51,24 +133,20 @@ if st.session_state.current_step == 'goal_selection':
     with col1:
         goal_type = st.selectbox(
             "Select your learning goal",
-            options=[
-                "python_programming",
-                "web_development",
-                "data_science",
-                "machine_learning",
-                "business_development",
-                "product_management"
-            ]
+            options=GOAL_TYPES
         )
+        # Use the user's think time to fetch questions for the highlighted goal
+        prefetcher.prefetch_questions(goal_type)
     
     if st.button("Next", type="primary"):
         with st.spinner("Generating questions..."):
             try:
                 # Get onboarding questions
-                questions = generator.get_onboarding_questions(goal_type)
+                questions = prefetcher.questions(goal_type)
                 st.session_state.onboarding_questions = questions
                 st.session_state.user_responses['goal_type'] = goal_type
                 st.session_state.current_step = 'onboarding'
+                save_session()
                 st.rerun()
             except Exception as e:
                 st.error(f"Error generating questions: {str(e)}")
@@ -78,7 +156,11 @@ elif st.session_state.current_step == 'onboarding':
     st.header("Let's customize your learning journey")
     
     questions = st.session_state.onboarding_questions
+    # Editing answers starts from the ones behind the current roadmap
+    previous = st.session_state.user_responses
+    editing = st.session_state.roadmap is not None
     responses = {}
+    answered = True
     
     fields = safe_get(questions, 'fields', default=[])
     for field in fields:
@@ -96,6 +178,7 @@ elif st.session_state.current_step == 'onboarding':
                 responses[field_id] = st.selectbox(
                     field_label,
                     options=options,
+                    index=options.index(previous[field_id]) if previous.get(field_id) in options else 0,
                     help=field_help,
                     key=field_id
                 )
@@ -105,48 +188,68 @@ elif st.session_state.current_step == 'onboarding':
                 responses[field_id] = st.multiselect(
                     field_label,
                     options=options,
+                    default=[option for option in previous.get(field_id) or [] if option in options],
                     help=field_help,
                     key=field_id
                 )
         elif field_type == 'number':
             validation = safe_get(field, 'validation', default={})
+            min_value = safe_get(validation, 'min', default=0)
+            max_value = safe_get(validation, 'max', default=100)
+            value = previous.get(field_id)
+            # number_input rejects a value of another numeric type than its bounds, or outside them
+            if type(value) is not type(min_value) or not min_value <= value <= max_value:
+                value = min_value
             responses[field_id] = st.number_input(
                 field_label,
-                min_value=safe_get(validation, 'min', default=0),
-                max_value=safe_get(validation, 'max', default=100),
+                min_value=min_value,
+                max_value=max_value,
+                value=value,
                 help=field_help,
                 key=field_id
             )
         else:  # text or textarea
             responses[field_id] = st.text_input(
                 field_label,
+                value=str(previous.get(field_id) or ''),
                 help=field_help,
                 key=field_id
             )
+        
+        if safe_get(field, 'required', default=False) and responses.get(field_id) in (None, '', []):
+            answered = False
+    
+    # Start a draft roadmap once the required answers are in; edits regenerate incrementally instead
+    if answered and not editing:
+        prefetcher.prefetch_roadmap(
+            st.session_state.user_responses['goal_type'],
+            {**st.session_state.user_responses, **responses}
+        )
     
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Back"):
+            prefetcher.cancel_all()
             st.session_state.current_step = 'goal_selection'
+            save_session()
             st.rerun()
     
     with col2:
         if st.button("Generate Roadmap", type="primary"):
-            with st.spinner("Generating your personalized roadmap..."):
-                try:
-                    # Update user responses
-                    st.session_state.user_responses.update(responses)
-                    
-                    # Generate roadmap
-                    roadmap = generator.generate_roadmap(
-                        st.session_state.user_responses['goal_type'],
-                        st.session_state.user_responses
-                    )
-                    st.session_state.roadmap = roadmap
-                    st.session_state.current_step = 'roadmap'
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error generating roadmap: {str(e)}")
+            # Update user responses; the roadmap step streams the result in
+            previous_hash = st.session_state.profile_hash
+            if editing:
+                st.session_state.regenerate_from = (
+                    st.session_state.roadmap, st.session_state.roadmap_responses, previous_hash
+                )
+            st.session_state.user_responses.update(responses)
+            st.session_state.profile_hash = profile_key(
+                st.session_state.user_responses['goal_type'], st.session_state.user_responses, "", ""
+            )
+            st.session_state.roadmap = None
+            st.session_state.current_step = 'roadmap'
+            save_session()
+            st.rerun()
 
 # Roadmap Display Step
 elif st.session_state.current_step == 'roadmap':
@@ -154,99 +257,104 @@ elif st.session_state.current_step == 'roadmap':
     
     roadmap = st.session_state.roadmap
     
-    # Display Research Insights
-    with st.expander("📚 Research Insights", expanded=True):
-        insights = safe_get(roadmap, 'research_insights', default={})
-        if insights:
-            key_concepts = safe_get(insights, 'key_concepts', default=[])
-            if key_concepts:
-                st.write("**Key Concepts:**")
-                for concept in key_concepts:
-                    st.write(f"- {concept}")
-            
-            prerequisites = safe_get(insights, 'prerequisites', default=[])
-            if prerequisites:
-                st.write("\n**Prerequisites:**")
-                for prereq in prerequisites:
-                    st.write(f"- {prereq}")
-            
-            learning_approach = safe_get(insights, 'learning_approach')
-            if learning_approach:
-                st.write(f"\n**Learning Approach:** {learning_approach}")
-            
-            estimated_duration = safe_get(insights, 'estimated_duration')
-            if estimated_duration:
-                st.write(f"**Estimated Duration:** {estimated_duration}")
-    
-    # Display Resources
-    with st.expander("🔍 Recommended Resources", expanded=True):
-        resources = safe_get(roadmap, 'resources', default={})
-        
-        courses = safe_get(resources, 'courses', default=[])
-        if courses:
-            st.subheader("Courses")
-            for course in courses:
-                title = safe_get(course, 'title', default='Course')
-                url = safe_get(course, 'url', default='#')
-                duration = safe_get(course, 'duration', default='')
-                platform = safe_get(course, 'platform', default='')
-                st.write(f"- [{title}]({url}) - {duration} ({platform})")
-        
-        tutorials = safe_get(resources, 'tutorials', default=[])
-        if tutorials:
-            st.subheader("Tutorials")
-            for tutorial in tutorials:
-                title = safe_get(tutorial, 'title', default='Tutorial')
-                url = safe_get(tutorial, 'url', default='#')
-                format_type = safe_get(tutorial, 'format', default='')
-                st.write(f"- [{title}]({url}) ({format_type})")
-        
-        docs = safe_get(resources, 'documentation', default=[])
-        if docs:
-            st.subheader("Documentation")
-            for doc in docs:
-                title = safe_get(doc, 'title', default='Documentation')
-                url = safe_get(doc, 'url', default='#')
-                doc_type = safe_get(doc, 'type', default='')
-                st.write(f"- [{title}]({url}) ({doc_type})")
-    
-    # Display Roadmap Milestones
+    insights_expander = st.expander("📚 Research Insights", expanded=True)
+    resources_expander = st.expander("🔍 Recommended Resources", expanded=True)
     st.subheader("🎯 Learning Milestones")
-    milestones = safe_get(roadmap, 'milestones', default=[])
-    for index, milestone in enumerate(milestones, 1):
-        title = safe_get(milestone, 'title', default=f'Milestone {index}')
-        with st.expander(f"📍 Milestone {index}: {title}", expanded=False):
-            description = safe_get(milestone, 'description', default='No description available')
-            st.write(f"**Description:** {description}")
-            
-            duration = safe_get(milestone, 'duration')
-            if duration:
-                st.write(f"**Duration:** {duration}")
-            
-            complexity = safe_get(milestone, 'complexity')
-            if complexity:
-                st.write(f"**Complexity:** {complexity}")
-            
-            exercises = safe_get(milestone, 'exercises', default=[])
-            if exercises:
-                st.write("\n**Exercises:**")
-                for exercise in exercises:
-                    ex_title = safe_get(exercise, 'title', default='Exercise')
-                    ex_desc = safe_get(exercise, 'description', default='')
-                    st.write(f"- **{ex_title}**: {ex_desc}")
-            
-            checkpoints = safe_get(milestone, 'checkpoints', default=[])
-            if checkpoints:
-                st.write("\n**Checkpoints:**")
-                for checkpoint in checkpoints:
-                    st.checkbox(checkpoint, key=f"check_{index}_{checkpoint}")
+    milestones_container = st.container()
+
+    if roadmap is None and st.session_state.regenerate_from is not None:
+        previous_roadmap, previous_responses, previous_hash = st.session_state.regenerate_from
+        st.session_state.regenerate_from = None
+        categories = {
+            safe_get(field, 'id'): safe_get(field, 'category', default='')
+            for field in safe_get(st.session_state.onboarding_questions, 'fields', default=[])
+        }
+        try:
+            with st.spinner("Updating your roadmap..."):
+                roadmap = generator.regenerate_roadmap(
+                    st.session_state.user_responses['goal_type'],
+                    st.session_state.user_responses,
+                    previous_roadmap,
+                    previous_responses,
+                    categories
+                )
+        except Exception:
+            logger.warning("regenerating the roadmap failed; generating it from scratch", exc_info=True)
+            roadmap = None
+        else:
+            keep_roadmap(roadmap)
+            # Carry ticked checkpoints over to the milestones that still have them
+            for (number, checkpoint), done in store.checkpoints(user_id, previous_hash).items():
+                if number <= len(roadmap.milestones) and checkpoint in roadmap.milestones[number - 1].checkpoints:
+                    st.session_state[checkpoint_key(number, checkpoint)] = done
+                    store.set_checkpoint(user_id, st.session_state.profile_hash, number, checkpoint, done)
+
+    if roadmap is None:
+        draft = prefetcher.take_roadmap(
+            st.session_state.user_responses['goal_type'],
+            st.session_state.user_responses
+        )
+        if draft is not None:
+            try:
+                with st.spinner("Finishing your personalized roadmap..."):
+                    roadmap = draft.result()
+            except Exception:
+                logger.warning("prefetched roadmap failed; streaming a fresh one", exc_info=True)
+            else:
+                keep_roadmap(roadmap)
+
+    if roadmap is None:
+        # Stream the roadmap and render each section as soon as it arrives
+        with insights_expander:
+            insights_slot = st.empty()
+        with resources_expander:
+            resources_slot = st.empty()
+        streamed_resources = {category: [] for category in RESOURCE_TYPES}
+        
+        try:
+            with st.spinner("Generating your personalized roadmap..."):
+                for section in generator.stream_roadmap(
+                    st.session_state.user_responses['goal_type'],
+                    st.session_state.user_responses
+                ):
+                    if section.kind == 'research_insights':
+                        insights_slot.markdown(insights_markdown(section.data))
+                    elif section.kind == 'resource':
+                        streamed_resources[section.category].append(section.data)
+                        resources_slot.markdown(resources_markdown(Resources(**streamed_resources)))
+                    elif section.kind == 'milestone':
+                        with milestones_container:
+                            milestone_fragment(
+                                section.index + 1, section.data, milestone_markdown(section.data), save_checkpoint
+                            )
+                    elif section.kind == 'roadmap':
+                        keep_roadmap(section.data)
+        except Exception as e:
+            st.error(f"Error generating roadmap: {str(e)}")
+            if st.button("Back"):
+                st.session_state.current_step = 'onboarding'
+                save_session()
+                st.rerun()
+            st.stop()
+    else:
+        render_roadmap(roadmap, insights_expander, resources_expander, milestones_container, save_checkpoint)
     
+    if st.session_state.roadmap is not None and st.button("Edit Answers"):
+        st.session_state.current_step = 'onboarding'
+        save_session()
+        st.rerun()
+
     # Reset Button
     if st.button("Start Over"):
+        prefetcher.cancel_all()
+        store.delete_session(user_id)
         st.session_state.current_step = 'goal_selection'
         st.session_state.user_responses = {}
         st.session_state.onboarding_questions = None
         st.session_state.roadmap = None
+        st.session_state.roadmap_responses = None
+        st.session_state.regenerate_from = None
+        st.session_state.profile_hash = None
         st.rerun()
 
 # Footer
@@ -0,0 +1,263 @@
+# batch.py
+"""Offline batch roadmap generation.
+
+Reads learner profiles from JSONL, one per line:
+
+    {"id": "learner-1", "goal_type": "python_programming", "user_responses": {...}}
+
+and appends one result per line to the output JSONL. The output file doubles
+as the checkpoint: profiles that already have a roadmap there are skipped, so
+re-running the same command after a crash resumes where it stopped. Failed
+profiles are written with an "error" and retried on the next run.
+
+    python batch.py profiles.jsonl roadmaps.jsonl --backend generator --mode async --workers 16 --rpm 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from cache import profile_key
+from instrumentation import InMemoryAggregator, Instrumentation, JSONLTraceSink
+from resilience import Resilience
+from router import ModelRouter, default_router
+
+
+def load_profiles(path: str) -> List[Dict]:
+    """Read profiles, deriving an id from the profile content when none is given."""
+    profiles = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            profile = json.loads(line)
+            if "goal_type" not in profile:
+                raise ValueError(f"{path}:{line_number}: profile has no goal_type")
+            profile.setdefault("user_responses", {})
+            profile.setdefault("id", profile_key(profile["goal_type"], profile["user_responses"], "", ""))
+            profiles.append(profile)
+    return profiles
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids that already have a roadmap in the output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash; the profile is simply redone
+                continue
+            if "roadmap" in record:
+                done.add(record["id"])
+    return done
+
+
+class RateLimiter:
+    """Spaces requests evenly to stay under a requests-per-minute limit."""
+
+    def __init__(self, requests_per_minute: Optional[float]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+            return slot - now
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ResultWriter:
+    """Thread-safe JSONL appender that flushes every record."""
+
+    def __init__(self, path: str):
+        # Make sure a line cut short by a crash doesn't swallow the next record
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+
+    def write(self, profile: Dict, roadmap: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        record = {"id": profile["id"], "goal_type": profile["goal_type"]}
+        if error is None:
+            record["roadmap"] = roadmap
+        else:
+            record["error"] = error
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if error is None:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def run_threaded(generate: Callable[[str, Dict], Dict], profiles: List[Dict], writer: ResultWriter,
+                 workers: int) -> None:
+    def work(profile: Dict) -> None:
+        goal_type, responses = profile["goal_type"], profile["user_responses"]
+        try:
+            writer.write(profile, roadmap=generate(goal_type, responses))
+        except Exception as e:
+            writer.write(profile, error=f"{type(e).__name__}: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(work, profiles))
+
+
+async def run_async(generate: Callable, profiles: List[Dict], writer: ResultWriter, workers: int) -> None:
+    queue = asyncio.Queue()
+    for profile in profiles:
+        queue.put_nowait(profile)
+
+    async def worker() -> None:
+        while not queue.empty():
+            profile = queue.get_nowait()
+            goal_type, responses = profile["goal_type"], profile["user_responses"]
+            try:
+                writer.write(profile, roadmap=await generate(goal_type, responses))
+            except Exception as e:
+                writer.write(profile, error=f"{type(e).__name__}: {e}")
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate roadmaps for a JSONL file of learner profiles.")
+    parser.add_argument("profiles", help="input JSONL of profiles")
+    parser.add_argument("output", help="output JSONL; also used to resume interrupted runs")
+    parser.add_argument("--backend", choices=["generator", "crew"], default="generator")
+    parser.add_argument("--mode", choices=["thread", "async"], default="thread")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="max upstream requests per minute, retries included; "
+                             "the crew backend splits it across its worker threads")
+    parser.add_argument("--sectioned", action="store_true", help="use sectioned generation (generator backend)")
+    parser.add_argument("--parallel-crew", action="store_true", help="use the parallel crew (crew backend)")
+    parser.add_argument("--trace", default=None, help="append a JSONL trace of every LLM call to this file")
+    parser.add_argument("--routes", default=None,
+                        help="JSON model routing config (see router.ModelRouter); defaults to $PATHFORGE_ROUTES")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+
+    profiles = load_profiles(args.profiles)
+    done = completed_ids(args.output)
+    pending = [p for p in profiles if p["id"] not in done]
+    print(f"{len(profiles)} profiles, {len(done)} already done, {len(pending)} to generate", file=sys.stderr)
+
+    aggregator = InMemoryAggregator()
+    instrumentation = Instrumentation([aggregator])
+    if args.trace:
+        instrumentation.add_sink(JSONLTraceSink(args.trace))
+
+    router = ModelRouter.from_file(args.routes) if args.routes else default_router()
+
+    limiter = RateLimiter(args.rpm)
+    writer = ResultWriter(args.output)
+    started = time.perf_counter()
+    try:
+        if args.backend == "generator":
+            from roadmap_generator import AsyncRoadmapGenerator, RoadmapGenerator
+            # Throttle each upstream attempt, not each profile
+            resilience = Resilience(limiter=limiter)
+            if args.mode == "async":
+                generator = AsyncRoadmapGenerator(api_key, max_concurrency=args.workers, resilience=resilience,
+                                                  instrumentation=instrumentation, router=router)
+
+                async def generate(goal_type, responses):
+                    roadmap = await generator.generate_roadmap(goal_type, responses, sectioned=args.sectioned)
+                    return roadmap.to_dict()
+
+                asyncio.run(run_async(generate, pending, writer, args.workers))
+            else:
+                generator = RoadmapGenerator(api_key, max_concurrency=args.workers, resilience=resilience,
+                                             instrumentation=instrumentation, router=router)
+                run_threaded(lambda g, r: generator.generate_roadmap(g, r, sectioned=args.sectioned).to_dict(),
+                             pending, writer, args.workers)
+        else:
+            from roadmap_crew import RoadmapCrew
+            # CrewAI throttles inside each crew, and every worker thread has its own
+            max_rpm = max(1, int(args.rpm // args.workers)) if args.rpm else None
+            crew = RoadmapCrew(openai_api_key=api_key, parallel=args.parallel_crew, max_rpm=max_rpm,
+                               instrumentation=instrumentation, router=router)
+            if args.mode == "async":
+                # A bounded pool keeps the number of per-thread crews at --workers
+                crew_pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="crew")
+
+                async def generate(goal_type, responses):
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(crew_pool, crew.generate_roadmap, goal_type, responses)
+
+                try:
+                    asyncio.run(run_async(generate, pending, writer, args.workers))
+                finally:
+                    crew_pool.shutdown()
+            else:
+                run_threaded(crew.generate_roadmap, pending, writer, args.workers)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    processed = writer.succeeded + writer.failed
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"generated {writer.succeeded}, failed {writer.failed} in {elapsed:.1f}s "
+        f"({rate:.2f} profiles/s, {rate * 60:.1f} profiles/min)",
+        file=sys.stderr
+    )
+    for row in aggregator.summary():
+        if row["cache_hits"] == row["count"]:
+            continue
+        print(
+            f"  {row['method']} [{row['goal_type']}, {row['model']}]: {row['count']} calls, "
+            f"p50 {row['latency_p50']:.2f}s, p95 {row['latency_p95']:.2f}s, p99 {row['latency_p99']:.2f}s, "
+            f"{row['prompt_tokens']} prompt / {row['completion_tokens']} completion tokens",
+            file=sys.stderr
+        )
+    rerouted = Counter(
+        (d.method, d.preferred, d.model, d.reason.partition(":")[0])
+        for d in router.decisions() if d.model != d.preferred
+    )
+    for (method, preferred, model, why), count in sorted(rerouted.items()):
+        print(f"  {method}: {count} calls {why} to {model}", file=sys.stderr)
+    return 1 if writer.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
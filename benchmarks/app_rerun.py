@@ -0,0 +1,146 @@
+# benchmarks/app_rerun.py
+"""Time roadmap page reruns with Streamlit's headless AppTest runner.
+
+Ticking a checkpoint used to rerun the whole script. Now it reruns only
+that milestone's fragment. For a synthetic roadmap this reports:
+
+  - a full page rerun after a checkpoint click (the old cost of every click;
+    still the cost of any other interaction)
+  - a milestone fragment rerun (the new cost of a checkpoint click)
+
+AppTest always reruns the whole script, so the fragment figure comes from a
+standalone script that renders one milestone fragment, not from app.py.
+
+    python benchmarks/app_rerun.py --milestones 12 --runs 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models import Roadmap  # noqa: E402
+
+
+def synthetic_roadmap(milestones: int, checkpoints: int = 5, exercises: int = 3, resources: int = 4) -> Roadmap:
+    text = "Practice the material with small, focused projects and review the results. " * 3
+    return Roadmap.from_dict({
+        "research_insights": {
+            "key_concepts": [f"Concept {i}" for i in range(8)],
+            "prerequisites": [f"Prerequisite {i}" for i in range(4)],
+            "learning_approach": text,
+            "estimated_duration": "6 months",
+        },
+        "resources": {
+            "courses": [{"title": f"Course {i}", "platform": "Platform", "url": "https://example.com",
+                         "duration": "4 weeks", "level": "beginner"} for i in range(resources)],
+            "tutorials": [{"title": f"Tutorial {i}", "url": "https://example.com", "format": "video"}
+                          for i in range(resources)],
+            "documentation": [{"title": f"Docs {i}", "url": "https://example.com", "type": "reference"}
+                              for i in range(resources)],
+        },
+        "milestones": [{
+            "title": f"Milestone topic {m}",
+            "description": text,
+            "duration": "2 weeks",
+            "complexity": "intermediate",
+            "exercises": [{"title": f"Exercise {e}", "description": text} for e in range(exercises)],
+            "checkpoints": [f"Checkpoint {m}.{c}" for c in range(checkpoints)],
+        } for m in range(milestones)],
+    })
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)] * 1000,
+    }
+
+
+def full_page_rerun(roadmap: Roadmap, runs: int) -> List[float]:
+    """Tick a different checkpoint each time and rerun the whole app script."""
+    from streamlit.testing.v1 import AppTest
+    import roadmap_generator
+
+    scratch = tempfile.mkdtemp()
+    os.environ.setdefault("PATHFORGE_CACHE_DIR", scratch)
+    os.environ.setdefault("PATHFORGE_STORE_PATH", os.path.join(scratch, "pathforge.db"))
+    # Keep the startup warm-up off the network
+    roadmap_generator.RoadmapGenerator.warm_up = lambda self, goal_types: []
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    app.secrets["OPENAI_API_KEY"] = "benchmark"
+    app.session_state["current_step"] = "roadmap"
+    app.session_state["user_responses"] = {"goal_type": "python_programming"}
+    app.session_state["roadmap"] = roadmap
+    app.session_state["profile_hash"] = "benchmark"
+    app.run()
+
+    samples = []
+    for run in range(runs):
+        checkbox = app.checkbox[run % len(app.checkbox)]
+        checkbox.set_value(not checkbox.value)
+        started = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - started)
+        assert not app.exception, app.exception
+    return samples
+
+
+def _fragment_script(root: str) -> None:
+    import sys
+    sys.path.insert(0, root)
+    import streamlit as st
+    from views import milestone_fragment
+    milestone_fragment(1, st.session_state.milestone, st.session_state.body)
+
+
+def fragment_rerun(roadmap: Roadmap, runs: int) -> List[float]:
+    """Tick a checkpoint and rerun a standalone script holding one milestone fragment."""
+    from streamlit.testing.v1 import AppTest
+    from views import milestone_markdown
+
+    milestone = roadmap.milestones[0]
+    app = AppTest.from_function(_fragment_script, args=(ROOT,), default_timeout=60)
+    app.session_state["milestone"] = milestone
+    app.session_state["body"] = milestone_markdown(milestone)
+    app.run()
+
+    samples = []
+    for run in range(runs):
+        checkbox = app.checkbox[run % len(app.checkbox)]
+        checkbox.set_value(not checkbox.value)
+        started = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - started)
+        assert not app.exception, app.exception
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark roadmap page reruns.")
+    parser.add_argument("--milestones", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    roadmap = synthetic_roadmap(args.milestones)
+    results = {
+        "full page rerun": summarize(full_page_rerun(roadmap, args.runs)),
+        "milestone fragment rerun (standalone script)": summarize(fragment_rerun(roadmap, args.runs)),
+    }
+    print(f"{args.milestones} milestones, {args.runs} checkpoint clicks each")
+    for name, stats in results.items():
+        print(f"  {name}: median {stats['median_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+    print("  (AppTest can't rerun a single fragment of app.py; the fragment figure times a\n"
+          "   standalone script that renders one milestone fragment)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
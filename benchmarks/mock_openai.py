@@ -0,0 +1,378 @@
+# benchmarks/mock_openai.py
+"""A local stand-in for the OpenAI chat-completions API.
+
+Answers POST /v1/chat/completions (streaming or not) with canned JSON in
+the shape each prompt asks for: onboarding questions, whole or sectioned
+roadmaps, and crew task outputs wrapped in the "Final Answer:" format
+crewai parses. Nothing leaves the machine, so runs are free and repeatable.
+
+Latency is modelled as a time to first token, drawn from a fixed, uniform,
+lognormal or exponential distribution, followed by output at
+tokens_per_second. Faults can be injected at configurable rates:
+  - 500 server errors
+  - 429 rate limits
+  - replies cut off with finish_reason "length", which the generator then
+    continues
+
+    python benchmarks/mock_openai.py --port 8089 --ttft-ms 300 --distribution lognormal --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 streamlit run app.py
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.app_rerun import synthetic_roadmap  # noqa: E402
+from prompts import CONTINUATION_PROMPT, count_tokens  # noqa: E402
+
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "exponential")
+
+
+@dataclass
+class MockConfig:
+    """Latency model and fault rates; every field is also a CLI flag.
+
+    ttft_ms is the median time to first token for fixed, lognormal and
+    exponential, and the midpoint for uniform (spread ttft_ms * spread
+    either side). sigma shapes the lognormal.
+    """
+    ttft_ms: float = 200.0
+    distribution: str = "lognormal"
+    spread: float = 0.5
+    sigma: float = 0.5
+    tokens_per_second: float = 200.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    truncate_rate: float = 0.0
+    milestones: int = 6
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+
+
+def _questions() -> Dict:
+    return {"fields": [
+        {"id": "experience_level", "label": "What is your experience level?", "type": "select",
+         "required": True, "category": "experience", "options": ["beginner", "intermediate", "advanced"],
+         "validation": None, "helpText": "", "order": 1},
+        {"id": "weekly_hours", "label": "Hours per week", "type": "number", "required": True,
+         "category": "time", "options": [], "validation": {"min": 1, "max": 40}, "helpText": "", "order": 2},
+        {"id": "learning_style", "label": "Preferred formats", "type": "multiselect", "required": False,
+         "category": "preferences", "options": ["video", "reading", "interactive"], "validation": None,
+         "helpText": "", "order": 3},
+        {"id": "goal", "label": "What do you want to build?", "type": "text", "required": False,
+         "category": "goals", "options": [], "validation": None, "helpText": "", "order": 4},
+    ]}
+
+
+def _roadmap(milestones: int) -> Dict:
+    return synthetic_roadmap(milestones).to_dict()
+
+
+def _graph(milestones: int) -> Dict:
+    return {
+        "nodes": [{"id": f"m{i}", "title": f"Module {i}", "duration": "1-2 weeks"} for i in range(milestones)],
+        "edges": [{"from": f"m{i}", "to": f"m{i + 1}"} for i in range(milestones - 1)],
+    }
+
+
+@lru_cache(maxsize=64)
+def _payload_text(kind: str, milestones: int) -> str:
+    return json.dumps(_payload(kind, milestones), separators=(",", ":"))
+
+
+def _payload(kind: str, milestones: int) -> Dict:
+    roadmap = _roadmap(milestones)
+    if kind == "questions":
+        return _questions()
+    if kind == "insights":
+        return {"research_insights": roadmap["research_insights"]}
+    if kind == "resources":
+        return {"resources": roadmap["resources"]}
+    if kind == "outline":
+        half = max(milestones // 2, 1)
+        titles = [milestone["title"] for milestone in roadmap["milestones"]]
+        return {"phases": [
+            {"title": "Foundations", "focus": "basics", "milestone_titles": titles[:half]},
+            {"title": "Projects", "focus": "applied work", "milestone_titles": titles[half:]},
+        ]}
+    if kind == "milestones":
+        return {"milestones": roadmap["milestones"][:max(milestones // 2, 1)]}
+    if kind == "research":
+        return {"required_skills": ["a", "b"], "prerequisites": ["c"], "learning_path_components": ["d"],
+                "industry_standards": ["e"], "common_challenges": [{"challenge": "f"}]}
+    if kind == "validation":
+        return {"questions": ["What did you learn?"], "tasks": ["Build it"], "project": "A small project",
+                "criteria": ["Works end to end"]}
+    if kind == "graph":
+        return _graph(milestones)
+    return roadmap
+
+
+# Checked in order against the last user message; the first match picks the payload
+ROUTES: List[Tuple[re.Pattern, str]] = [(re.compile(pattern, re.I), kind) for pattern, kind in [
+    (r"onboarding questions", "questions"),
+    (r"create a personalized learning roadmap", "roadmap"),
+    (r"give research insights", "insights"),
+    (r"curate learning resources \(", "resources"),
+    (r"outline the roadmap", "outline"),
+    (r"milestones of phase", "milestones"),
+    (r"validation questions", "validation"),
+    (r"nodes \(learning modules\)", "graph"),
+    (r"curate", "resources"),
+    (r"analyze the learning requirements", "research"),
+]]
+SCHEMA_ROUTES = {"onboarding_questions": "questions", "roadmap_insights": "insights",
+                 "roadmap_resources": "resources", "roadmap_outline": "outline",
+                 "roadmap_milestones": "milestones", "roadmap": "roadmap"}
+
+
+def _content(message: Dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def reply_text(request: Dict, milestones: int) -> str:
+    """The full reply for a chat-completions request body."""
+    messages = request.get("messages") or []
+    if messages and _content(messages[-1]) == CONTINUATION_PROMPT:
+        # Regenerate the original reply and return what the cut-off part is missing
+        partial = _content(messages[-2])
+        original = dict(request, messages=messages[:-2])
+        if not partial.startswith("Thought:"):
+            # The continuation request carries no response_format, but the original was JSON
+            original["response_format"] = {"type": "json_object"}
+        return reply_text(original, milestones)[len(partial):]
+
+    response_format = request.get("response_format") or {}
+    kind = SCHEMA_ROUTES.get((response_format.get("json_schema") or {}).get("name"))
+    if kind is None:
+        prompt = " ".join(_content(message) for message in messages if message.get("role") != "system")
+        kind = next((kind for pattern, kind in ROUTES if pattern.search(prompt)), "roadmap")
+    text = _payload_text(kind, milestones)
+    if not response_format:
+        # Crew agents parse a ReAct-style reply
+        text = f"Thought: I now can give a great answer\nFinal Answer: {text}"
+    return text
+
+
+class MockServer:
+    """Threaded mock server; use as a context manager or start()/stop().
+
+    Counters: requests, errors (injected 500s and 429s) and truncations.
+    """
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.truncations = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _draw(self) -> Tuple[float, float, float, float]:
+        """Time to first token in seconds and three uniforms for the fault checks."""
+        config = self.config
+        with self._lock:
+            rng = self._random
+            median = config.ttft_ms / 1000
+            if config.distribution == "fixed":
+                ttft = median
+            elif config.distribution == "uniform":
+                ttft = rng.uniform(median * (1 - config.spread), median * (1 + config.spread))
+            elif config.distribution == "lognormal":
+                ttft = rng.lognormvariate(math.log(median), config.sigma) if median > 0 else 0.0
+            else:
+                # Exponential with the given median
+                ttft = rng.expovariate(math.log(2) / median) if median > 0 else 0.0
+            return max(ttft, 0.0), rng.random(), rng.random(), rng.random()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _json(self, status: int, body: Dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+                else:
+                    self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._json(400, {"error": {"message": "invalid JSON body", "type": "invalid_request_error"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                    return
+                server._count("requests")
+                try:
+                    server._respond(self, request)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on the request, e.g. a cancelled or hedged call
+                    self.close_connection = True
+
+        return Handler
+
+    def _respond(self, handler: BaseHTTPRequestHandler, request: Dict) -> None:
+        config = self.config
+        ttft, error_draw, limit_draw, truncate_draw = self._draw()
+        time.sleep(ttft)
+        if error_draw < config.error_rate:
+            self._count("errors")
+            handler._json(500, {"error": {"message": "injected server error", "type": "server_error"}})
+            return
+        if limit_draw < config.rate_limit_rate:
+            self._count("errors")
+            handler._json(429, {"error": {"message": "injected rate limit", "type": "rate_limit_error"}})
+            return
+
+        text = reply_text(request, config.milestones)
+        finish_reason = "stop"
+        if truncate_draw < config.truncate_rate and len(text) > 1:
+            self._count("truncations")
+            text, finish_reason = text[:len(text) // 2], "length"
+        prompt_tokens = sum(count_tokens(_content(message)) for message in request.get("messages") or [])
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": count_tokens(text),
+                 "total_tokens": prompt_tokens + count_tokens(text)}
+        model = request.get("model") or "mock"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not request.get("stream"):
+            time.sleep(usage["completion_tokens"] / config.tokens_per_second)
+            handler._json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def send(delta: Dict, finish: Optional[str] = None, usage_chunk: Optional[Dict] = None) -> None:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [] if usage_chunk else [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            if usage_chunk:
+                chunk["usage"] = usage_chunk
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        # Roughly one token per chunk, paced at tokens_per_second against a deadline so
+        # per-chunk overhead doesn't add up; sleep only when ahead of schedule
+        step = 4
+        delay = 1 / config.tokens_per_second
+        started = time.perf_counter()
+        for number, start in enumerate(range(0, len(text), step), 1):
+            send({"content": text[start:start + step]})
+            ahead = started + number * delay - time.perf_counter()
+            if ahead > 0.001:
+                time.sleep(ahead)
+        send({}, finish_reason)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send({}, usage_chunk=usage)
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    for field in fields(MockConfig):
+        flag = "--" + field.name.replace("_", "-")
+        if field.name == "distribution":
+            parser.add_argument(flag, choices=DISTRIBUTIONS, default=field.default)
+        elif field.name == "seed":
+            parser.add_argument(flag, type=int, default=None)
+        else:
+            parser.add_argument(flag, type=type(field.default), default=field.default)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(**{field.name: getattr(args, field.name) for field in fields(MockConfig)})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI chat-completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = MockServer(config_from_args(args), args.host, args.port)
+    print(f"mock OpenAI API at {server.base_url}", file=sys.stderr)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
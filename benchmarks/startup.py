@@ -0,0 +1,183 @@
+# benchmarks/startup.py
+"""Profile cold-start cost: module imports and first-use initialization.
+
+On an autoscaled worker everything done before the first page paints adds
+to the first request's latency. This reports:
+
+  - the cold import time of each project module and heavy dependency, each
+    in a fresh interpreter, with its most expensive imports
+  - the wall time of each initialization step in the order a worker meets
+    them, with the top-level packages each step imported
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --check   # exit 1 if the goal page imports crewai/openai
+
+--check renders the goal-selection page with warm question caches and
+fails if crewai or openai were imported to do it; both are meant to load
+only once a call actually needs them.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROJECT_MODULES = (
+    "cache", "models", "views", "store", "prefetch", "roadmap_generator", "roadmap_crew", "semantic_cache", "graph",
+)
+DEPENDENCY_MODULES = ("streamlit", "numpy", "openai", "crewai")
+# Must not be imported to render the goal-selection page
+DEFERRED_MODULES = ("crewai", "openai")
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_cost(module: str, top: int = 5) -> Dict:
+    """Cold import time of a module in a fresh interpreter, with its heaviest direct imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+    total = 0
+    children: List[Tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if not indent and name == module:
+            total = int(cumulative)
+        elif len(indent) == 2:
+            # Direct imports of the module; the nested ones are counted in them
+            children.append((name, int(cumulative) / 1000))
+    children.sort(key=lambda child: child[1], reverse=True)
+    return {"module": module, "ms": total / 1000, "heaviest": children[:top]}
+
+
+def app_goal_types() -> List[str]:
+    """GOAL_TYPES from app.py, read without running the app."""
+    with open(os.path.join(ROOT, "app.py"), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "GOAL_TYPES" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("GOAL_TYPES not found in app.py")
+
+
+def _seed_question_cache(goal_types: List[str]) -> None:
+    """Cache questions for every goal, so rendering the app makes no API calls."""
+    from roadmap_generator import AsyncRoadmapGenerator
+    generator = AsyncRoadmapGenerator(api_key="startup")
+    for goal_type in goal_types:
+        generator.question_cache.set(generator._questions_key(goal_type), {"fields": []})
+
+
+def _render_goal_page():
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    app.secrets["OPENAI_API_KEY"] = "startup"
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    if [header.value for header in app.header] != ["What would you like to learn?"]:
+        raise RuntimeError("goal-selection page did not render")
+    return app
+
+
+def _timed_step(name: str, step: Callable[[], object]) -> Dict:
+    before = {module.partition(".")[0] for module in sys.modules}
+    started = time.perf_counter()
+    step()
+    elapsed = time.perf_counter() - started
+    imported = sorted(
+        name for name in {module.partition(".")[0] for module in sys.modules} - before if not name.startswith("_")
+    )
+    return {"step": name, "ms": elapsed * 1000, "imported": imported}
+
+
+def init_costs() -> List[Dict]:
+    """Time each first-use step in one process, in the order a worker reaches them."""
+    _seed_question_cache(app_goal_types())
+    state: Dict[str, object] = {}
+
+    def generator():
+        from roadmap_generator import RoadmapGenerator
+        state["generator"] = RoadmapGenerator(api_key="startup")
+
+    def crew():
+        from roadmap_crew import RoadmapCrew
+        state["crew"] = RoadmapCrew(openai_api_key="startup")
+
+    return [
+        _timed_step("goal page first render", _render_goal_page),
+        _timed_step("RoadmapGenerator()", generator),
+        _timed_step("OpenAI client (first API call)", lambda: state["generator"].async_generator.client),
+        _timed_step("RoadmapCrew()", crew),
+        _timed_step("crew agents (first crew call)", lambda: state["crew"].create_agents()),
+        _timed_step("semantic cache", lambda: __import__("semantic_cache").SemanticCache()),
+    ]
+
+
+def check_goal_page() -> Optional[str]:
+    """None if the goal page renders without the deferred modules, else what went wrong."""
+    _seed_question_cache(app_goal_types())
+    try:
+        _render_goal_page()
+    except RuntimeError as e:
+        return str(e)
+    imported = [module for module in DEFERRED_MODULES if module in sys.modules]
+    if imported:
+        return f"goal page imported {', '.join(imported)}"
+    return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold-start import and initialization cost.")
+    parser.add_argument("--check", action="store_true",
+                        help="only check that the goal page renders without crewai/openai")
+    parser.add_argument("--output", help="write the profile as JSON to this path")
+    args = parser.parse_args(argv)
+
+    # Keep the profile away from the real caches and sessions
+    scratch = tempfile.mkdtemp(prefix="pathforge-startup-")
+    os.environ["PATHFORGE_CACHE_DIR"] = scratch
+    os.environ["PATHFORGE_STORE_PATH"] = os.path.join(scratch, "pathforge.db")
+
+    if args.check:
+        problem = check_goal_page()
+        print(f"FAIL: {problem}" if problem else "ok: goal page rendered without " + ", ".join(DEFERRED_MODULES))
+        return 1 if problem else 0
+
+    imports = [import_cost(module) for module in PROJECT_MODULES + DEPENDENCY_MODULES]
+    print("cold imports (fresh interpreter each)")
+    for cost in imports:
+        if "error" in cost:
+            print(f"  {cost['module']:<20} failed: {cost['error']}")
+            continue
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in cost["heaviest"][:3])
+        print(f"  {cost['module']:<20} {cost['ms']:8.1f} ms   {heaviest}")
+
+    steps = init_costs()
+    print("initialization (one process, in order)")
+    for step in steps:
+        imported = ", ".join(step["imported"][:6]) + (" ..." if len(step["imported"]) > 6 else "")
+        print(f"  {step['step']:<32} {step['ms']:8.1f} ms   {imported}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"imports": imports, "init": steps}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+# benchmarks/suite.py
+"""Latency and throughput benchmarks against the local mock API.
+
+Each scenario sends --requests calls at each --concurrency level and reports
+p50/p95/p99 latency, throughput and error rate:
+
+  questions         AsyncRoadmapGenerator.get_onboarding_questions
+  roadmap           AsyncRoadmapGenerator.generate_roadmap
+  roadmap_sectioned generate_roadmap(sectioned=True)
+  roadmap_stream    consuming AsyncRoadmapGenerator.stream_roadmap
+  crew              RoadmapCrew.generate_roadmap
+  app               an AppTest session: goal page, Next, answers, Generate Roadmap
+
+Caches are bypassed and every call uses a distinct profile, so the numbers
+measure the request path rather than cache hits. Results are written as
+JSON. With --baseline, they are compared against an earlier results file,
+and the run exits 1 if any latency percentile grew, or throughput dropped,
+by more than --threshold.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json --threshold 0.2 --scenarios questions,roadmap
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_openai import MockServer, add_config_arguments, config_from_args  # noqa: E402
+
+SCENARIOS = ("questions", "roadmap", "roadmap_sectioned", "roadmap_stream", "crew", "app")
+GOAL_TYPE = "python_programming"
+
+# Metrics compared against the baseline, and whether higher is worse
+COMPARED = {"p50_ms": True, "p95_ms": True, "p99_ms": True, "throughput_rps": False}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Linear-interpolated percentile of sorted samples."""
+    if not ordered:
+        return float("nan")
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(latencies: List[float], errors: List[BaseException], wall: float) -> Dict:
+    ordered = sorted(latencies)
+    requests = len(latencies) + len(errors)
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "error_rate": len(errors) / requests if requests else 0.0,
+        "error_types": dict(Counter(type(error).__name__ for error in errors)),
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+    }
+
+
+def profile(run: int) -> Dict:
+    return {"experience_level": "beginner", "weekly_hours": 10, "goal": f"benchmark run {run}"}
+
+
+async def _run_async(call: Callable[[int], Awaitable], requests: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[BaseException] = []
+
+    async def one(run: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(run)
+            except Exception as e:
+                errors.append(e)
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(run) for run in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _importable(name: str):
+    """A function of this module by import path rather than via __main__.
+
+    Process pools pickle functions by reference, and AppTest replaces the
+    workers' __main__ with app.py.
+    """
+    from benchmarks import suite
+    return getattr(suite, name)
+
+
+def _timed(call: Callable[[int], object], run: int) -> Tuple[Optional[float], Optional[BaseException]]:
+    started = time.perf_counter()
+    try:
+        call(run)
+    except Exception as e:
+        return None, e
+    return time.perf_counter() - started, None
+
+
+def _run_threaded(call: Callable[[int], object], requests: int, concurrency: int,
+                  processes: bool = False) -> Dict[str, float]:
+    """Run calls on a pool of threads, or of processes for calls that aren't thread-safe."""
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=concurrency)
+        # Pay each worker's import cost before the clock starts
+        list(pool.map(_importable("_warm_worker"), range(concurrency)))
+    else:
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+    started = time.perf_counter()
+    with pool:
+        outcomes = list(pool.map(_importable("_timed"), [call] * requests, range(requests)))
+    wall = time.perf_counter() - started
+    return summarize([latency for latency, _ in outcomes if latency is not None],
+                     [error for _, error in outcomes if error is not None], wall)
+
+
+def _generator_call(scenario: str, generator, offset: int) -> Callable[[int], Awaitable]:
+    async def questions(run: int):
+        return await generator.get_onboarding_questions(f"{GOAL_TYPE}_{offset + run}", refresh=True)
+
+    async def roadmap(run: int):
+        return await generator.generate_roadmap(GOAL_TYPE, profile(offset + run), refresh=True,
+                                                sectioned=scenario == "roadmap_sectioned")
+
+    async def stream(run: int):
+        async for _ in generator.stream_roadmap(GOAL_TYPE, profile(offset + run), refresh=True):
+            pass
+
+    return {"questions": questions, "roadmap": roadmap, "roadmap_sectioned": roadmap,
+            "roadmap_stream": stream}[scenario]
+
+
+async def _run_generator(scenario: str, generator, offset: int, requests: int,
+                         concurrency: int) -> Dict[str, float]:
+    try:
+        return await _run_async(_generator_call(scenario, generator, offset), requests, concurrency)
+    finally:
+        await generator.client.close()
+
+
+def _warm_worker(_: int) -> None:
+    import streamlit.testing.v1  # noqa: F401
+    import roadmap_generator  # noqa: F401
+    time.sleep(0.1)
+
+
+def _app_session_from(offset: int, run: int) -> None:
+    _app_session(offset + run)
+
+
+def _app_session(run: int) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    app.secrets["OPENAI_API_KEY"] = "benchmark"
+    app.query_params["user"] = f"benchmark-{run}-{time.time_ns()}"
+    def click(label: str) -> None:
+        buttons = [button for button in app.button if button.label == label]
+        if app.exception or not buttons:
+            errors = [error.value for error in app.error] + [str(exception) for exception in app.exception]
+            raise RuntimeError(f"app session stopped before {label!r}: {'; '.join(errors) or 'no such button'}")
+        buttons[0].click().run()
+
+    app.run()
+    click("Next")
+    for text_input in app.text_input:
+        text_input.input(f"benchmark session {run}")
+    click("Generate Roadmap")
+    # The roadmap page ends with a Start Over button once a roadmap is shown
+    click("Start Over")
+
+
+def run_scenario(scenario: str, levels: List[int], requests: int, scratch: str) -> Dict[str, Dict]:
+    results = {}
+    if scenario in ("questions", "roadmap", "roadmap_sectioned", "roadmap_stream"):
+        from roadmap_generator import AsyncRoadmapGenerator
+        for index, level in enumerate(levels):
+            # A fresh generator per level: its client binds to the event loop that first uses it
+            generator = AsyncRoadmapGenerator(
+                "benchmark", cache_dir=os.path.join(scratch, scenario), max_concurrency=max(levels)
+            )
+            results[str(level)] = asyncio.run(_run_generator(scenario, generator, index * requests, requests, level))
+    elif scenario == "crew":
+        from roadmap_crew import RoadmapCrew
+        crew = RoadmapCrew("benchmark", cache_dir=os.path.join(scratch, scenario))
+        crew.create_agents()
+        for index, level in enumerate(levels):
+            offset = index * requests
+            results[str(level)] = _run_threaded(
+                lambda run: crew.generate_roadmap(GOAL_TYPE, profile(offset + run), refresh=True), requests, level
+            )
+    elif scenario == "app":
+        # AppTest runs share a global Streamlit runtime, so concurrent sessions need their own processes;
+        # each process then stands for one app server
+        for index, level in enumerate(levels):
+            results[str(level)] = _run_threaded(
+                functools.partial(_importable("_app_session_from"), index * requests), requests, level,
+                processes=True
+            )
+    else:
+        raise ValueError(f"unknown scenario {scenario!r}")
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Regressions of current against baseline, as printable lines."""
+    regressions = []
+    for scenario, levels in current["results"].items():
+        for level, stats in levels.items():
+            before = baseline.get("results", {}).get(scenario, {}).get(level)
+            if before is None:
+                continue
+            for metric, higher_is_worse in COMPARED.items():
+                old, new = before.get(metric), stats.get(metric)
+                if not old or new is None or new != new:
+                    continue
+                change = (new - old) / old
+                if change > threshold if higher_is_worse else change < -threshold:
+                    regressions.append(
+                        f"{scenario} @ {level}: {metric} {old:.1f} -> {new:.1f} ({change:+.0%})"
+                    )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark generation paths against the mock OpenAI API.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="requests per scenario and level")
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    config = config_from_args(args)
+
+    scratch = tempfile.mkdtemp(prefix="pathforge-bench-")
+    with MockServer(config) as server:
+        # Every client (openai, crewai, the app's generator) picks these up
+        os.environ.update({
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_BASE": server.base_url,
+            "PATHFORGE_CACHE_DIR": os.path.join(scratch, "app"),
+            "PATHFORGE_STORE_PATH": os.path.join(scratch, "app", "pathforge.db"),
+            "CREWAI_DISABLE_TELEMETRY": "true",
+            "OTEL_SDK_DISABLED": "true",
+        })
+        results = {}
+        for scenario in scenarios:
+            results[scenario] = run_scenario(scenario, levels, args.requests, scratch)
+            for level, stats in results[scenario].items():
+                print(f"{scenario:18} c={level:>3}  p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  "
+                      f"p99 {stats['p99_ms']:8.1f} ms  {stats['throughput_rps']:7.2f} req/s  "
+                      f"errors {stats['errors']} {stats['error_types'] or ''}", file=sys.stderr)
+        upstream = {"requests": server.requests, "errors": server.errors, "truncations": server.truncations}
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": levels,
+            "mock": asdict(config),
+            "upstream": upstream,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("mock") != report["meta"]["mock"]:
+            print("warning: baseline was recorded with a different mock configuration", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
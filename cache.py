@@ -0,0 +1,229 @@
+# cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Bump when the on-disk entry layout changes so old entries are ignored.
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "PATHFORGE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pathforge")
+)
+DEFAULT_ROADMAP_TTL = 30 * 24 * 60 * 60
+
+
+def normalize_responses(value: Any) -> Any:
+    """Canonicalize user responses so equivalent answers hash the same."""
+    if isinstance(value, dict):
+        items = sorted((str(k).strip(), v) for k, v in value.items())
+        return {k: normalize_responses(v) for k, v in items}
+    if isinstance(value, (list, tuple, set)):
+        items = [normalize_responses(v) for v in value]
+        # Multiselect answers are unordered; sort them by their JSON form
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def profile_key(goal_type: str, user_responses: Dict, prompt_version: str, model: str) -> str:
+    """Content-addressed key for a roadmap request."""
+    payload = {
+        "goal_type": goal_type.strip(),
+        "responses": normalize_responses(user_responses),
+        "prompt_version": prompt_version,
+        "model": model,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """JSON file cache with per-entry TTL, one file per key."""
+
+    def __init__(self, directory: str, namespace: str, ttl: Optional[float] = None):
+        self.directory = os.path.join(directory, f"{namespace}-v{CACHE_FORMAT_VERSION}")
+        self.ttl = ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def lookup(self, key: str, allow_stale: bool = False) -> Optional[Tuple[Any, Optional[float]]]:
+        """The cached value and when it expires (None for never), or None if missing, expired or unreadable.
+
+        Expired entries stay on disk until overwritten or invalidated, so
+        allow_stale=True can still serve them when upstream is unavailable.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("key") != key or entry.get("value") is None:
+            return None
+        expires_at = None if self.ttl is None else entry.get("created_at", 0) + self.ttl
+        if not allow_stale and expires_at is not None and time.time() > expires_at:
+            return None
+        return entry["value"], expires_at
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """Return the cached value, or None if missing, expired or unreadable."""
+        found = self.lookup(key, allow_stale)
+        return None if found is None else found[0]
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Return a value even if its TTL has passed."""
+        return self.get(key, allow_stale=True)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value atomically so concurrent readers never see partial files."""
+        entry = {"key": key, "created_at": time.time(), "value": value}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one entry, or every entry in this cache when no key is given."""
+        if key is not None:
+            self._remove(self._path(key))
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.directory, name))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class LRUCache:
+    """Bounded, thread-safe in-memory LRU cache."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """In-process LRU in front of a DiskCache, with hit/miss/eviction counters.
+
+    Memory entries carry the disk entry's expiry, so the LRU never serves a
+    value the disk tier would already treat as expired.
+    """
+
+    def __init__(self, memory: LRUCache, disk: DiskCache):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        cached = self.memory.get(key)
+        if cached is None:
+            return None
+        value, expires_at = cached
+        if expires_at is not None and time.time() > expires_at:
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._memory_get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+
+        found = self.disk.lookup(key)
+        if found is not None:
+            self.memory.set(key, found)
+            with self._lock:
+                self.disk_hits += 1
+            return found[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = None if self.disk.ttl is None else time.time() + self.disk.ttl
+        self.memory.set(key, (value, expires_at))
+        self.disk.set(key, value)
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Return a value even if its TTL has passed; not counted in stats."""
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached[0]
+        return self.disk.get_stale(key)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        self.memory.invalidate(key)
+        self.disk.invalidate(key)
+
+    def __contains__(self, key: str) -> bool:
+        # Membership checks don't count towards hit/miss stats
+        return self._memory_get(key) is not None or key in self.disk
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.memory.evictions,
+                "memory_size": len(self.memory),
+                "memory_maxsize": self.memory.maxsize,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
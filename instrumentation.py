@@ -0,0 +1,289 @@
+# instrumentation.py
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("pathforge")
+
+
+@dataclass
+class CallRecord:
+    """Measurements for one completion or crew kickoff."""
+    method: str
+    goal_type: str
+    model: str
+    started_at: float = field(default_factory=time.time)
+    latency: float = 0.0
+    ttft: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    hedged: bool = False
+    cache_hit: bool = False
+    parse_failure: bool = False
+    repaired: bool = False
+    continued: bool = False
+    truncated: bool = False
+    error: Optional[str] = None
+
+    def set_usage(self, usage) -> None:
+        """Copy token counts from an OpenAI or crewai usage object, if any."""
+        if usage is None:
+            return
+        if isinstance(usage, dict):
+            self.prompt_tokens = usage.get("prompt_tokens", 0) or 0
+            self.completion_tokens = usage.get("completion_tokens", 0) or 0
+        else:
+            self.prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+    def add_usage(self, usage) -> None:
+        """Add token counts from a follow-up request to the ones already set."""
+        prompt_tokens, completion_tokens = self.prompt_tokens, self.completion_tokens
+        self.set_usage(usage)
+        if usage is not None:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    @property
+    def regeneration_saved(self) -> bool:
+        """Output that plain json.loads would have rejected was recovered."""
+        return (self.repaired or self.continued) and not self.parse_failure and self.error is None
+
+
+class Instrumentation:
+    """Fan-out of CallRecords to pluggable sinks.
+
+    A sink is any object with a record(CallRecord) method. With no sinks, or
+    with enabled=False, spans cost a couple of attribute lookups.
+    """
+
+    def __init__(self, sinks: Optional[List] = None, enabled: bool = True):
+        self.sinks = list(sinks or [])
+        self.enabled = enabled
+
+    def add_sink(self, sink) -> None:
+        self.sinks.append(sink)
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and bool(self.sinks)
+
+    @contextmanager
+    def span(self, method: str, goal_type: str, model: str) -> Iterator[CallRecord]:
+        """Time the enclosed call and emit its record, including failures."""
+        record = CallRecord(method=method, goal_type=goal_type, model=model)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            self.emit(record)
+
+    def emit(self, record: CallRecord) -> None:
+        if not self.active:
+            return
+        for sink in self.sinks:
+            try:
+                sink.record(record)
+            except Exception:
+                logger.exception("instrumentation sink %r failed", sink)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class _Series:
+    __slots__ = ("count", "errors", "cache_hits", "parse_failures", "repairs", "continuations",
+                 "truncations", "regenerations_saved", "retries", "hedges",
+                 "prompt_tokens", "completion_tokens", "latency_sum", "latencies", "ttfts")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.parse_failures = 0
+        self.repairs = 0
+        self.continuations = 0
+        self.truncations = 0
+        self.regenerations_saved = 0
+        self.retries = 0
+        self.hedges = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_sum = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.ttfts: Deque[float] = deque(maxlen=window)
+
+
+class InMemoryAggregator:
+    """Aggregates records per (method, goal_type, model) with latency percentiles.
+
+    Percentiles are computed over the last `window` upstream calls of each
+    series; cache hits are counted but not sampled.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], _Series] = defaultdict(lambda: _Series(self.window))
+
+    def record(self, record: CallRecord) -> None:
+        with self._lock:
+            series = self._series[(record.method, record.goal_type, record.model)]
+            series.count += 1
+            series.errors += record.error is not None
+            series.cache_hits += record.cache_hit
+            series.parse_failures += record.parse_failure
+            series.repairs += record.repaired
+            series.continuations += record.continued
+            series.truncations += record.truncated
+            series.regenerations_saved += record.regeneration_saved
+            series.retries += record.retries
+            series.hedges += record.hedged
+            series.prompt_tokens += record.prompt_tokens
+            series.completion_tokens += record.completion_tokens
+            if record.cache_hit:
+                # Keep percentiles about upstream latency
+                return
+            series.latency_sum += record.latency
+            series.latencies.append(record.latency)
+            if record.ttft is not None:
+                series.ttfts.append(record.ttft)
+
+    def latencies(self, method: Optional[str] = None) -> List[float]:
+        """Recent latency samples, optionally for one method only."""
+        with self._lock:
+            samples = []
+            for (series_method, _, _), series in self._series.items():
+                if method is None or series_method == method:
+                    samples.extend(series.latencies)
+            return samples
+
+    def summary(self) -> List[Dict]:
+        with self._lock:
+            rows = []
+            for (method, goal_type, model), series in sorted(self._series.items()):
+                latencies = sorted(series.latencies)
+                ttfts = sorted(series.ttfts)
+                row = {
+                    "method": method,
+                    "goal_type": goal_type,
+                    "model": model,
+                    "count": series.count,
+                    "errors": series.errors,
+                    "cache_hits": series.cache_hits,
+                    "parse_failures": series.parse_failures,
+                    "repairs": series.repairs,
+                    "continuations": series.continuations,
+                    "truncations": series.truncations,
+                    "regenerations_saved": series.regenerations_saved,
+                    "retries": series.retries,
+                    "hedges": series.hedges,
+                    "prompt_tokens": series.prompt_tokens,
+                    "completion_tokens": series.completion_tokens,
+                    "latency_sum": series.latency_sum,
+                    # Cache hits are left out of the latency figures
+                    "latency_count": series.count - series.cache_hits,
+                }
+                for q in self.QUANTILES:
+                    row[f"latency_p{int(q * 100)}"] = _percentile(latencies, q)
+                    row[f"ttft_p{int(q * 100)}"] = _percentile(ttfts, q)
+                rows.append(row)
+            return rows
+
+
+class PrometheusExporter:
+    """Renders an InMemoryAggregator in the Prometheus text exposition format."""
+
+    COUNTERS = (
+        ("calls", "count", "LLM calls"),
+        ("errors", "errors", "LLM calls that raised"),
+        ("cache_hits", "cache_hits", "Calls served from cache"),
+        ("parse_failures", "parse_failures", "Responses that were not valid JSON"),
+        ("repairs", "repairs", "Malformed JSON responses repaired locally"),
+        ("continuations", "continuations", "Cut-off responses completed by a continuation request"),
+        ("truncations", "truncations", "Cut-off responses rejected because they stayed incomplete"),
+        ("regenerations_saved", "regenerations_saved", "Malformed responses recovered without regenerating"),
+        ("retries", "retries", "Retried upstream attempts"),
+        ("hedges", "hedges", "Calls that fired a hedged duplicate request"),
+        ("prompt_tokens", "prompt_tokens", "Prompt tokens sent"),
+        ("completion_tokens", "completion_tokens", "Completion tokens received"),
+    )
+
+    def __init__(self, aggregator: InMemoryAggregator, prefix: str = "pathforge_llm"):
+        self.aggregator = aggregator
+        self.prefix = prefix
+
+    @staticmethod
+    def _escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def _labels(self, row: Dict, **extra) -> str:
+        labels = {"method": row["method"], "goal_type": row["goal_type"], "model": row["model"], **extra}
+        return "{" + ",".join(f'{k}="{self._escape(v)}"' for k, v in labels.items()) + "}"
+
+    def render(self) -> str:
+        rows = self.aggregator.summary()
+        lines = []
+        for name, column, help_text in self.COUNTERS:
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for row in rows:
+                lines.append(f"{metric}{self._labels(row)} {row[column]}")
+
+        for name, key in (("latency_seconds", "latency"), ("ttft_seconds", "ttft")):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} summary")
+            for row in rows:
+                for q in InMemoryAggregator.QUANTILES:
+                    value = row[f"{key}_p{int(q * 100)}"]
+                    lines.append(f"{metric}{self._labels(row, quantile=q)} {value}")
+                if key == "latency":
+                    lines.append(f"{metric}_sum{self._labels(row)} {row['latency_sum']}")
+                    lines.append(f"{metric}_count{self._labels(row)} {row['latency_count']}")
+        return "\n".join(lines) + "\n"
+
+
+class JSONLTraceSink:
+    """Appends every record to a JSONL file."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord) -> None:
+        line = json.dumps(asdict(record)) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class LoggingSink:
+    """Logs each record as one structured line; replaces verbose stdout printing."""
+
+    def __init__(self, level: int = logging.INFO, log: logging.Logger = logger):
+        self.level = level
+        self.log = log
+
+    def record(self, record: CallRecord) -> None:
+        if self.log.isEnabledFor(self.level):
+            self.log.log(self.level, "llm_call %s", json.dumps(asdict(record)), extra={"call": asdict(record)})
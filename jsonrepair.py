@@ -0,0 +1,131 @@
+# jsonrepair.py
+import json
+import re
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+# A complete or unterminated string literal, or a structural character
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*(")?|[{}\[\],]', re.S)
+_LEADING_FENCE = re.compile(r"\A\s*```[\w-]*[ \t]*\n?")
+
+_CLOSERS = {"{": "}", "[": "]"}
+_OPENERS = {"}": "{", "]": "["}
+
+# Models put raw newlines and tabs inside strings often enough to allow them
+_decoder = json.JSONDecoder(strict=False)
+
+
+class TruncatedOutputError(RuntimeError):
+    """Output was cut off; closing it would pass a partial document off as complete."""
+
+
+class RepairResult(NamedTuple):
+    """A decoded value and what it took to get it.
+
+    repaired is False when the text was valid JSON as-is; truncated is True
+    when unterminated strings, objects or arrays had to be closed.
+    """
+    value: Any
+    repaired: bool
+    truncated: bool
+
+
+def strip_leading_fence(text: str) -> str:
+    return _LEADING_FENCE.sub("", text, count=1)
+
+
+def _start(text: str) -> int:
+    for opener in "{[":
+        index = text.find(opener)
+        if index != -1:
+            return index
+    raise ValueError("no JSON object found in output")
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    index = len(out) - 1
+    while index >= 0 and not out[index].strip():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def _close(stack) -> str:
+    return "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def repair_json(text: str) -> RepairResult:
+    """Decode the outermost JSON object in model output, repairing it if needed.
+
+    Valid JSON takes the plain json.loads path. Otherwise prose and code
+    fences around the object are dropped, trailing commas removed, and a
+    truncated document is closed: first as-is, and if the cut left a dangling
+    key or partial literal, at the last complete element instead. Raises
+    ValueError when nothing usable can be recovered.
+    """
+    try:
+        return RepairResult(_decoder.decode(text), False, False)
+    except ValueError:
+        pass
+
+    start = _start(text)
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+        return RepairResult(value, True, False)
+    except ValueError:
+        pass
+
+    out: List[str] = []
+    stack: List[str] = []
+    # Where the document can be cut and closed without losing validity
+    safe: Optional[Tuple[int, Tuple[str, ...]]] = None
+    in_string = False
+    pos = start
+    for match in _TOKEN.finditer(text, start):
+        out.append(text[pos:match.start()])
+        token = match.group()
+        pos = match.end()
+        if token[0] == '"':
+            out.append(token)
+            if match.group(1) is None:
+                in_string = True
+                break
+        elif token == ",":
+            safe = (len(out), tuple(stack))
+            out.append(token)
+        elif token in _CLOSERS:
+            stack.append(token)
+            out.append(token)
+            # An empty container is only worth keeping when nothing completed before it
+            if safe is None:
+                safe = (len(out), tuple(stack))
+        elif _OPENERS[token] in stack:
+            _drop_trailing_comma(out)
+            # Close anything the model left open inside this container
+            while stack[-1] != _OPENERS[token]:
+                out.append(_CLOSERS[stack.pop()])
+            stack.pop()
+            out.append(token)
+            if not stack:
+                return RepairResult(_decoder.decode("".join(out)), True, False)
+    else:
+        out.append(text[pos:])
+
+    head = "".join(out).rstrip()
+    if in_string:
+        # The string token stops before a lone trailing backslash, so this can't be escaped
+        head += '"'
+    attempts = [head[:-1] + _close(stack) if head.endswith(",") else head + _close(stack)]
+    if safe is not None:
+        cut, open_stack = safe
+        attempts.append("".join(out[:cut]) + _close(open_stack))
+    for attempt in attempts:
+        try:
+            return RepairResult(_decoder.decode(attempt), True, True)
+        except ValueError:
+            continue
+    raise ValueError("could not repair JSON output")
+
+
+def loads(text: str) -> Any:
+    """json.loads for model output; see repair_json."""
+    return repair_json(text).value
@@ -0,0 +1,268 @@
+# models.py
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from streaming import RoadmapSection
+
+
+def _require_object(data: Any, path: str) -> Dict:
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must be an object")
+    return data
+
+
+def _text(data: Dict, key: str, path: str, default: str = "") -> str:
+    value = data.get(key)
+    if value is None:
+        return default
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"{path}.{key} must be a string")
+    return str(value).strip() or default
+
+
+def _texts(data: Dict, key: str, path: str) -> Tuple[str, ...]:
+    value = data.get(key)
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ValueError(f"{path}.{key} must be a list of strings")
+    # Duplicates would also collide as widget keys in the app
+    return tuple(dict.fromkeys(text for text in (str(v).strip() for v in value if v is not None) if text))
+
+
+def _objects(data: Dict, key: str, path: str, cls) -> tuple:
+    value = data.get(key)
+    if value is None:
+        return ()
+    if not isinstance(value, list):
+        raise ValueError(f"{path}.{key} must be a list")
+    return tuple(cls.from_dict(item, f"{path}.{key}[{i}]") for i, item in enumerate(value))
+
+
+def _object(data: Dict, key: str, path: str) -> Dict:
+    value = data.get(key)
+    if value is None:
+        return {}
+    return _require_object(value, f"{path}.{key}")
+
+
+@dataclass
+class Exercise:
+    __slots__ = ("title", "description")
+    title: str
+    description: str
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "exercise") -> "Exercise":
+        data = _require_object(data, path)
+        return cls(_text(data, "title", path, "Exercise"), _text(data, "description", path))
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "description": self.description}
+
+
+@dataclass
+class Milestone:
+    __slots__ = ("title", "description", "duration", "complexity", "exercises", "checkpoints")
+    title: str
+    description: str
+    duration: str
+    complexity: str
+    exercises: Tuple[Exercise, ...]
+    checkpoints: Tuple[str, ...]
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "milestone", number: Optional[int] = None) -> "Milestone":
+        data = _require_object(data, path)
+        return cls(
+            title=_text(data, "title", path, f"Milestone {number}" if number else "Milestone"),
+            description=_text(data, "description", path),
+            duration=_text(data, "duration", path),
+            complexity=_text(data, "complexity", path),
+            exercises=_objects(data, "exercises", path, Exercise),
+            checkpoints=_texts(data, "checkpoints", path),
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "title": self.title,
+            "description": self.description,
+            "duration": self.duration,
+            "complexity": self.complexity,
+            "exercises": [exercise.to_dict() for exercise in self.exercises],
+            "checkpoints": list(self.checkpoints),
+        }
+
+
+@dataclass
+class Course:
+    __slots__ = ("title", "platform", "url", "duration", "level")
+    title: str
+    platform: str
+    url: str
+    duration: str
+    level: str
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "course") -> "Course":
+        data = _require_object(data, path)
+        return cls(
+            title=_text(data, "title", path, "Course"),
+            platform=_text(data, "platform", path),
+            url=_text(data, "url", path, "#"),
+            duration=_text(data, "duration", path),
+            level=_text(data, "level", path),
+        )
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "platform": self.platform, "url": self.url,
+                "duration": self.duration, "level": self.level}
+
+
+@dataclass
+class Tutorial:
+    __slots__ = ("title", "url", "format")
+    title: str
+    url: str
+    format: str
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "tutorial") -> "Tutorial":
+        data = _require_object(data, path)
+        return cls(_text(data, "title", path, "Tutorial"), _text(data, "url", path, "#"), _text(data, "format", path))
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "url": self.url, "format": self.format}
+
+
+@dataclass
+class Documentation:
+    __slots__ = ("title", "url", "type")
+    title: str
+    url: str
+    type: str
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "documentation") -> "Documentation":
+        data = _require_object(data, path)
+        return cls(_text(data, "title", path, "Documentation"), _text(data, "url", path, "#"), _text(data, "type", path))
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "url": self.url, "type": self.type}
+
+
+RESOURCE_TYPES = {"courses": Course, "tutorials": Tutorial, "documentation": Documentation}
+
+
+@dataclass
+class Resources:
+    __slots__ = ("courses", "tutorials", "documentation")
+    courses: Tuple[Course, ...]
+    tutorials: Tuple[Tutorial, ...]
+    documentation: Tuple[Documentation, ...]
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "resources") -> "Resources":
+        data = _require_object(data, path)
+        # Categories outside the schema are dropped
+        return cls(*(_objects(data, category, path, model) for category, model in RESOURCE_TYPES.items()))
+
+    def to_dict(self) -> Dict:
+        return {category: [item.to_dict() for item in getattr(self, category)] for category in RESOURCE_TYPES}
+
+
+@dataclass
+class ResearchInsights:
+    __slots__ = ("key_concepts", "prerequisites", "learning_approach", "estimated_duration")
+    key_concepts: Tuple[str, ...]
+    prerequisites: Tuple[str, ...]
+    learning_approach: str
+    estimated_duration: str
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "research_insights") -> "ResearchInsights":
+        data = _require_object(data, path)
+        return cls(
+            key_concepts=_texts(data, "key_concepts", path),
+            prerequisites=_texts(data, "prerequisites", path),
+            learning_approach=_text(data, "learning_approach", path),
+            estimated_duration=_text(data, "estimated_duration", path),
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "key_concepts": list(self.key_concepts),
+            "prerequisites": list(self.prerequisites),
+            "learning_approach": self.learning_approach,
+            "estimated_duration": self.estimated_duration,
+        }
+
+
+@dataclass
+class Roadmap:
+    """A validated roadmap with every optional field filled in.
+
+    Built once from the generator's JSON so rendering never has to guard
+    against missing keys or wrong types; to_dict() gives the JSON shape back.
+    """
+    __slots__ = ("research_insights", "resources", "milestones")
+    research_insights: ResearchInsights
+    resources: Resources
+    milestones: Tuple[Milestone, ...]
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "Roadmap":
+        """Normalize a generated roadmap; raise ValueError if its shape is unusable."""
+        try:
+            data = _require_object(data, "roadmap")
+            milestones = data.get("milestones")
+            if not isinstance(milestones, list) or not milestones:
+                raise ValueError("roadmap.milestones must be a non-empty list")
+            return cls(
+                research_insights=ResearchInsights.from_dict(_object(data, "research_insights", "roadmap")),
+                resources=Resources.from_dict(_object(data, "resources", "roadmap")),
+                milestones=tuple(
+                    Milestone.from_dict(m, f"roadmap.milestones[{i}]", number=i + 1) for i, m in enumerate(milestones)
+                ),
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid roadmap: {e}") from None
+
+    def to_dict(self) -> Dict:
+        return {
+            "research_insights": self.research_insights.to_dict(),
+            "resources": self.resources.to_dict(),
+            "milestones": [milestone.to_dict() for milestone in self.milestones],
+        }
+
+    def sections(self) -> Iterator[RoadmapSection]:
+        """Yield the roadmap's sections in streaming order, ending with the roadmap itself."""
+        yield RoadmapSection("research_insights", self.research_insights)
+        for category in RESOURCE_TYPES:
+            for index, item in enumerate(getattr(self.resources, category)):
+                yield RoadmapSection("resource", item, category=category, index=index)
+        for index, milestone in enumerate(self.milestones):
+            yield RoadmapSection("milestone", milestone, index=index)
+        yield RoadmapSection("roadmap", self)
+
+
+def typed_section(section: RoadmapSection) -> Optional[RoadmapSection]:
+    """Swap a streamed section's raw JSON for its model.
+
+    Returns None for sections that don't fit the schema (unknown resource
+    categories, wrong types), which the stream skips; the complete roadmap is
+    validated as a whole at the end.
+    """
+    try:
+        if section.kind == "research_insights":
+            return section._replace(data=ResearchInsights.from_dict(section.data))
+        if section.kind == "resource":
+            model = RESOURCE_TYPES.get(section.category)
+            return None if model is None else section._replace(data=model.from_dict(section.data))
+        if section.kind == "milestone":
+            return section._replace(data=Milestone.from_dict(section.data, number=section.index + 1))
+    except ValueError:
+        return None
+    return section
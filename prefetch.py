@@ -0,0 +1,88 @@
+# prefetch.py
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from cache import profile_key
+from models import Roadmap
+
+
+class Prefetcher:
+    """Per-session store of speculative generator calls.
+
+    The app calls prefetch_questions() for the highlighted goal and
+    prefetch_roadmap() for the answers entered so far. Only the latest request
+    of each kind is kept: starting a new one cancels the stale one. Calls that
+    are already cached don't touch the network and are free; every other
+    speculative call spends one unit of the session's budget, and once the
+    budget is gone prefetching stops and the app falls back to direct calls.
+    """
+
+    def __init__(self, generator, budget: int = 4):
+        self.generator = generator
+        self.budget = budget
+        self.spent = 0
+        self._lock = threading.Lock()
+        self._questions = None   # (goal_type, Future)
+        self._roadmap = None     # (key, Future)
+
+    def _spend(self) -> bool:
+        if self.spent >= self.budget:
+            return False
+        self.spent += 1
+        return True
+
+    @staticmethod
+    def _cancel(entry) -> None:
+        if entry is not None:
+            entry[1].cancel()
+
+    def prefetch_questions(self, goal_type: str) -> None:
+        """Start fetching questions for the highlighted goal, replacing older work."""
+        with self._lock:
+            if self._questions is not None and self._questions[0] == goal_type:
+                return
+            self._cancel(self._questions)
+            self._questions = None
+            if self.generator.has_cached_questions(goal_type) or not self._spend():
+                return
+            self._questions = (goal_type, self.generator.submit_onboarding_questions(goal_type))
+
+    def questions(self, goal_type: str) -> Dict:
+        """Return questions for the goal, using the prefetched call when it matches."""
+        with self._lock:
+            entry = self._questions
+            self._questions = None
+        if entry is not None and entry[0] == goal_type and not entry[1].cancelled():
+            return entry[1].result()
+        self._cancel(entry)
+        return self.generator.get_onboarding_questions(goal_type)
+
+    def prefetch_roadmap(self, goal_type: str, user_responses: Dict) -> None:
+        """Start a draft roadmap for the current answers, replacing any older draft."""
+        key = profile_key(goal_type, user_responses, "", "")
+        with self._lock:
+            if self._roadmap is not None and self._roadmap[0] == key:
+                return
+            self._cancel(self._roadmap)
+            self._roadmap = None
+            if self.generator.has_cached_roadmap(goal_type, user_responses) or not self._spend():
+                return
+            self._roadmap = (key, self.generator.submit_roadmap(goal_type, user_responses))
+
+    def take_roadmap(self, goal_type: str, user_responses: Dict) -> Optional["Future[Roadmap]"]:
+        """Hand over the draft if it was made for exactly these answers, else cancel it."""
+        key = profile_key(goal_type, user_responses, "", "")
+        with self._lock:
+            entry = self._roadmap
+            self._roadmap = None
+        if entry is not None and entry[0] == key and not entry[1].cancelled():
+            return entry[1]
+        self._cancel(entry)
+        return None
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            self._cancel(self._questions)
+            self._cancel(self._roadmap)
+            self._questions = self._roadmap = None
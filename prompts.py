@@ -0,0 +1,255 @@
+# prompts.py
+import json
+import re
+import string
+import textwrap
+from typing import Any, Dict, List, Optional
+
+# Model families that accept response_format={"type": "json_schema", ...}
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
+# Answers already carried by the prompt itself, or that never change the result
+IGNORED_RESPONSE_FIELDS = ("goal_type",)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def prune_responses(user_responses: Dict) -> Dict:
+    """Drop unanswered and redundant fields before they are sent to the model."""
+    pruned = {}
+    for key, value in user_responses.items():
+        if key in IGNORED_RESPONSE_FIELDS:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, "", [], {}):
+            continue
+        pruned[key] = value
+    return pruned
+
+
+class PromptTemplate:
+    """A prompt compiled once at import time.
+
+    Indentation and blank lines are stripped so rendered prompts carry no
+    whitespace padding; values are substituted for $placeholders.
+    """
+
+    def __init__(self, text: str):
+        lines = [line.strip() for line in textwrap.dedent(text).strip().splitlines()]
+        self.text = re.sub(r"\n{2,}", "\n", "\n".join(lines))
+        self._template = string.Template(self.text)
+
+    def render(self, **values: Any) -> str:
+        return self._template.substitute(values)
+
+
+def _nullable(schema: Dict) -> Dict:
+    return {**schema, "type": [schema["type"], "null"]}
+
+
+def _object(properties: Dict) -> Dict:
+    # Strict structured outputs require every property and no extras
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+STRING = {"type": "string"}
+STRINGS = {"type": "array", "items": STRING}
+
+QUESTIONS_SCHEMA = _object({
+    "fields": {"type": "array", "items": _object({
+        "id": STRING,
+        "label": STRING,
+        "type": {"type": "string", "enum": ["text", "number", "select", "multiselect"]},
+        "required": {"type": "boolean"},
+        "category": STRING,
+        "options": STRINGS,
+        "validation": _nullable(_object({
+            "min": _nullable({"type": "number"}),
+            "max": _nullable({"type": "number"}),
+        })),
+        "helpText": STRING,
+        "order": {"type": "integer"},
+    })},
+})
+
+INSIGHTS_SCHEMA = _object({
+    "key_concepts": STRINGS,
+    "prerequisites": STRINGS,
+    "learning_approach": STRING,
+    "estimated_duration": STRING,
+})
+
+RESOURCES_SCHEMA = _object({
+    "courses": {"type": "array", "items": _object({
+        "title": STRING, "platform": STRING, "url": STRING, "duration": STRING, "level": STRING,
+    })},
+    "tutorials": {"type": "array", "items": _object({"title": STRING, "url": STRING, "format": STRING})},
+    "documentation": {"type": "array", "items": _object({"title": STRING, "url": STRING, "type": STRING})},
+})
+
+MILESTONE_SCHEMA = _object({
+    "title": STRING,
+    "description": STRING,
+    "duration": STRING,
+    "complexity": STRING,
+    "exercises": {"type": "array", "items": _object({"title": STRING, "description": STRING})},
+    "checkpoints": STRINGS,
+})
+
+ROADMAP_SCHEMA = _object({
+    "research_insights": INSIGHTS_SCHEMA,
+    "resources": RESOURCES_SCHEMA,
+    "milestones": {"type": "array", "items": MILESTONE_SCHEMA},
+})
+
+SECTION_SCHEMAS = {
+    "insights": _object({"research_insights": INSIGHTS_SCHEMA}),
+    "resources": _object({"resources": RESOURCES_SCHEMA}),
+    "outline": _object({"phases": {"type": "array", "items": _object({
+        "title": STRING, "focus": STRING, "milestone_titles": STRINGS,
+    })}}),
+    "milestones": _object({"milestones": {"type": "array", "items": MILESTONE_SCHEMA}}),
+}
+
+
+def schema_skeleton(schema: Dict) -> str:
+    """Render a JSON schema as the compact {"key":type} sketch used in prompts."""
+    types = schema.get("type")
+    kind = types[0] if isinstance(types, list) else types
+    if "enum" in schema:
+        return "|".join(schema["enum"])
+    if kind == "object":
+        return "{" + ",".join(f'"{k}":{schema_skeleton(v)}' for k, v in schema["properties"].items()) + "}"
+    if kind == "array":
+        return "[" + schema_skeleton(schema["items"]) + "]"
+    return {"integer": "number", "boolean": "bool"}.get(kind, kind)
+
+
+def supports_structured_outputs(model: str) -> bool:
+    return model.startswith(STRUCTURED_OUTPUT_MODELS)
+
+
+def response_format(name: str, schema: Dict, model: str) -> Dict:
+    """Schema-enforced output where the model supports it, JSON mode otherwise."""
+    if supports_structured_outputs(model):
+        return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+    return {"type": "json_object"}
+
+
+def schema_instruction(schema: Dict, model: str) -> str:
+    """Shape hint for the prompt; unnecessary when the API enforces the schema."""
+    if supports_structured_outputs(model):
+        return "Return minified JSON."
+    return f"Return only minified JSON shaped as: {schema_skeleton(schema)}"
+
+
+QUESTIONS_SYSTEM = "You are a form design specialist who creates effective questionnaires."
+ROADMAP_SYSTEM = "You are a learning path expert who creates personalized roadmaps."
+
+# Shared with the crew's question task
+QUESTION_TOPICS = (
+    "current experience and background, learning preferences and style, time availability "
+    "and constraints, specific goals and objectives, resource preferences and limitations"
+)
+
+QUESTIONS_PROMPT = PromptTemplate("""
+    Create onboarding questions for a $goal_type learning goal, covering: $topics.
+    Use options only for select/multiselect and validation only for number fields.
+    $schema
+""")
+
+ROADMAP_PROMPT = PromptTemplate("""
+    Create a personalized learning roadmap for $goal_type.
+    User profile: $profile
+    Include research insights, curated resources (courses, tutorials, documentation) and milestones with clear progression.
+    $schema
+""")
+
+
+def messages(system: str, user: str) -> List[Dict]:
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def questions_messages(goal_type: str, model: str) -> List[Dict]:
+    return messages(QUESTIONS_SYSTEM, QUESTIONS_PROMPT.render(
+        goal_type=goal_type, topics=QUESTION_TOPICS, schema=schema_instruction(QUESTIONS_SCHEMA, model)
+    ))
+
+
+def roadmap_messages(goal_type: str, user_responses: Dict, model: str) -> List[Dict]:
+    return messages(ROADMAP_SYSTEM, ROADMAP_PROMPT.render(
+        goal_type=goal_type,
+        profile=compact_json(prune_responses(user_responses)),
+        schema=schema_instruction(ROADMAP_SCHEMA, model)
+    ))
+
+
+CONTINUATION_PROMPT = (
+    "Your reply was cut off. Continue exactly where it stopped, without repeating anything; "
+    "output only the remaining JSON text."
+)
+
+
+def continuation_messages(original: List[Dict], partial: str) -> List[Dict]:
+    """Ask for only the missing tail of a cut-off reply."""
+    return original + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUATION_PROMPT},
+    ]
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken when it is installed, else a ~4 chars/token estimate."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, (len(text) + 3) // 4)
+
+
+def token_report(prompts: Dict[str, List[Dict]], usage: Optional[List[Dict]] = None) -> List[Dict]:
+    """Input-token accounting per prompt.
+
+    prompts maps a prompt name to its rendered messages. usage optionally takes
+    InMemoryAggregator.summary() rows to add observed average prompt and
+    completion tokens per call for the same names.
+    """
+    observed = {}
+    for row in usage or []:
+        calls = row["count"] - row["cache_hits"]
+        if calls:
+            totals = observed.setdefault(row["method"], [0, 0, 0])
+            totals[0] += calls
+            totals[1] += row["prompt_tokens"]
+            totals[2] += row["completion_tokens"]
+
+    report = []
+    for name, rendered in prompts.items():
+        row = {
+            "prompt": name,
+            "messages": len(rendered),
+            "chars": sum(len(m["content"]) for m in rendered),
+            "input_tokens": sum(count_tokens(m["content"]) for m in rendered),
+        }
+        if name in observed:
+            calls, prompt_tokens, completion_tokens = observed[name]
+            row["observed_prompt_tokens"] = prompt_tokens / calls
+            row["observed_completion_tokens"] = completion_tokens / calls
+        report.append(row)
+    return report
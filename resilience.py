@@ -0,0 +1,336 @@
+# resilience.py
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from instrumentation import CallRecord
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection problems, rate limits and 5xx responses are worth retrying."""
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if type(exc).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    return getattr(exc, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retryable: Callable[[BaseException], bool] = is_retryable):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets a single probe through after reset_timeout."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.state = self.CLOSED
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self.state = self.CLOSED
+
+    def release(self) -> None:
+        """End a call that says nothing about upstream, e.g. a cancelled one; frees a half-open probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful attempt latencies per call key."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def add(self, key: str, latency: float) -> None:
+        with self._lock:
+            self._samples[key].append(latency)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        """The q-th latency percentile, or None until enough samples are in."""
+        with self._lock:
+            samples = sorted(self._samples[key])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+class Resilience:
+    """Retries, hedging and circuit breaking around upstream calls.
+
+    Each attempt that is still running once it passes the hedge_percentile
+    latency for its key gets one duplicate, and whichever finishes first
+    wins. Retryable failures are retried with jittered backoff. Consecutive
+    failures open the breaker, and calls then fail fast with CircuitOpenError
+    so callers can fall back to cached data.
+
+    call() wraps coroutine factories; call_sync() wraps blocking callables
+    such as crew kickoffs, hedging them on a small thread pool.
+
+    An optional limiter (anything with acquire() and acquire_async(), e.g.
+    batch.RateLimiter) is waited on before every attempt, so retries and
+    hedges count against the rate too. The primary attempt waits before the
+    hedge clock starts, so time spent queued for a slot never fires a hedge.
+    """
+
+    def __init__(self, retry: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None,
+                 hedge_percentile: Optional[float] = 0.95, tracker: Optional[LatencyTracker] = None,
+                 hedge_workers: int = 4, limiter=None):
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_percentile = hedge_percentile
+        self.tracker = tracker or LatencyTracker()
+        self.hedge_workers = hedge_workers
+        self.limiter = limiter
+        self._executor = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuits = 0
+        self.fallbacks = 0
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        return self.tracker.percentile(key, self.hedge_percentile)
+
+    def note_fallback(self) -> None:
+        """Record that a caller served cached data because the breaker was open."""
+        self._count(fallbacks=1)
+
+    def _check_breaker(self) -> None:
+        if not self.breaker.allow():
+            self._count(short_circuits=1)
+            raise CircuitOpenError("upstream circuit breaker is open")
+
+    def _is_upstream_failure(self, exc: BaseException) -> bool:
+        """Upstream trouble counts against the breaker; a bad request only fails its own call."""
+        status = getattr(exc, "status_code", None)
+        return self.retry.retryable(exc) or (isinstance(status, int) and status >= 500)
+
+    def _record_error(self, exc: BaseException) -> None:
+        if self._is_upstream_failure(exc):
+            self.breaker.record_failure()
+        else:
+            # Upstream answered, so it is up; this also settles a half-open probe
+            self.breaker.record_success()
+
+    def _should_retry(self, exc: BaseException, retry: int) -> bool:
+        return retry + 1 < self.retry.max_attempts and self.retry.retryable(exc)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], key: str,
+                   record: Optional[CallRecord] = None, hedge: bool = True) -> T:
+        self._count(calls=1)
+        retry = 0
+        while True:
+            self._check_breaker()
+            try:
+                result = await self._hedged(fn, key, record, hedge)
+            except Exception as e:
+                self._record_error(e)
+                if not self._should_retry(e, retry):
+                    raise
+                retry += 1
+                self._count(retries=1)
+                if record is not None:
+                    record.retries += 1
+                await asyncio.sleep(self.retry.backoff(retry))
+                continue
+            except BaseException:
+                # Cancelled: neither a success nor a failure, but a half-open probe must be handed back
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], key: str, throttle: bool = True) -> T:
+        if throttle and self.limiter is not None:
+            await self.limiter.acquire_async()
+        self._count(attempts=1)
+        started = time.perf_counter()
+        result = await fn()
+        self.tracker.add(key, time.perf_counter() - started)
+        return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]], key: str,
+                      record: Optional[CallRecord], hedge: bool) -> T:
+        delay = self.hedge_delay(key) if hedge else None
+        if delay is None:
+            return await self._attempt(fn, key)
+
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        primary = asyncio.ensure_future(self._attempt(fn, key, throttle=False))
+
+        # Whatever ends this call, including the caller being cancelled, an
+        # attempt whose result isn't returned must not keep running
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._count(hedges=1)
+            if record is not None:
+                record.hedged = True
+            backup = asyncio.ensure_future(self._attempt(fn, key))
+            pending = {primary, backup}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._count(hedge_wins=1)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+
+    def call_sync(self, fn: Callable[[], T], key: str,
+                  record: Optional[CallRecord] = None, hedge: bool = True) -> T:
+        self._count(calls=1)
+        retry = 0
+        while True:
+            self._check_breaker()
+            try:
+                result = self._hedged_sync(fn, key, record, hedge)
+            except Exception as e:
+                self._record_error(e)
+                if not self._should_retry(e, retry):
+                    raise
+                retry += 1
+                self._count(retries=1)
+                if record is not None:
+                    record.retries += 1
+                time.sleep(self.retry.backoff(retry))
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def _attempt_sync(self, fn: Callable[[], T], key: str, throttle: bool = True) -> T:
+        if throttle and self.limiter is not None:
+            self.limiter.acquire()
+        self._count(attempts=1)
+        started = time.perf_counter()
+        result = fn()
+        self.tracker.add(key, time.perf_counter() - started)
+        return result
+
+    def _hedged_sync(self, fn: Callable[[], T], key: str,
+                     record: Optional[CallRecord], hedge: bool) -> T:
+        delay = self.hedge_delay(key) if hedge else None
+        if delay is None:
+            return self._attempt_sync(fn, key)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="hedge")
+        if self.limiter is not None:
+            self.limiter.acquire()
+        primary = self._executor.submit(self._attempt_sync, fn, key, False)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count(hedges=1)
+        if record is not None:
+            record.hedged = True
+        backup = self._executor.submit(self._attempt_sync, fn, key)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count(hedge_wins=1)
+                    # A blocking loser can't be interrupted; its result is dropped
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "short_circuits": self.short_circuits,
+                "fallbacks": self.fallbacks,
+                "breaker_state": self.breaker.state,
+            }
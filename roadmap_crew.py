@@ -1,15 +1,121 @@
-from crewai import Agent, Task, Crew, Process
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
+import hashlib
 import json
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from cache import DEFAULT_CACHE_DIR, DEFAULT_ROADMAP_TTL, DiskCache, LRUCache, TieredCache, profile_key
+from instrumentation import CallRecord, Instrumentation
+from jsonrepair import TruncatedOutputError, repair_json
+from prompts import QUESTION_TOPICS, compact_json, prune_responses
+from resilience import CircuitOpenError, Resilience
+from router import ModelRouter, default_router
+
+if TYPE_CHECKING:
+    # crewai takes seconds to import, so it's only imported once a crew is built
+    from crewai import Agent, Crew, Task
+
+# Bump when a task description changes so cached crew results are regenerated.
+CREW_PROMPT_VERSION = "3"
+
+RESOURCE_CATEGORIES = ("courses", "tutorials", "documentation")
+
+
+def _milestone_data(milestone) -> Dict:
+    """A milestone as plain JSON data; the generator returns models.Milestone."""
+    return milestone.to_dict() if hasattr(milestone, "to_dict") else milestone
+
 
 class RoadmapCrew:
-    def __init__(self, openai_api_key: str):
+    """Crew-based roadmap generation.
+
+    Agents, tasks and crews are built once per thread and reused across calls;
+    per-call values reach the task descriptions through kickoff inputs. With
+    parallel=True, resource curation runs as concurrent per-category tasks
+    that receive the research output as explicit context.
+
+    Kickoffs are reported through `instrumentation`; crewai's own stdout
+    printing is off unless verbose=True. Each flow runs on the model `router`
+    picks for "crew.<flow>", with agents built per model. max_rpm caps each
+    crew's LLM requests per minute through crewai's own limiter; since crews
+    are per thread, the process-wide rate is up to max_rpm per thread.
+    """
+
+    def __init__(self, openai_api_key: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 roadmap_ttl: Optional[float] = DEFAULT_ROADMAP_TTL,
+                 roadmap_cache_size: int = 256, validation_cache_size: int = 1024, parallel: bool = False,
+                 verbose: bool = False, instrumentation: Optional[Instrumentation] = None,
+                 resilience: Optional[Resilience] = None, router: Optional[ModelRouter] = None,
+                 max_rpm: Optional[int] = None):
         self.openai_api_key = openai_api_key
-        
+        self.max_rpm = max_rpm
+        self.parallel = parallel
+        self.verbose = verbose
+        self.instrumentation = instrumentation or Instrumentation()
+        self.resilience = resilience or Resilience()
+        self.router = router or default_router()
+        if self.router not in self.instrumentation.sinks:
+            self.instrumentation.add_sink(self.router)
+        self.roadmap_cache = TieredCache(
+            LRUCache(maxsize=roadmap_cache_size),
+            DiskCache(cache_dir, "crew_roadmaps", ttl=roadmap_ttl)
+        )
+        self.validation_cache = TieredCache(
+            LRUCache(maxsize=validation_cache_size),
+            DiskCache(cache_dir, "crew_validations", ttl=roadmap_ttl)
+        )
+        # Crew objects keep per-run state, so each thread gets its own set
+        self._local = threading.local()
+
+    def _thread_state(self) -> None:
+        if getattr(self._local, "agents", None) is None:
+            self._local.agents = {}
+            self._local.crews = {}
+            self._local.timings = {}
+
+    def _agents(self, model: Optional[str] = None) -> Dict[str, Agent]:
+        """The calling thread's agents on a model, by default the crew route's."""
+        self._thread_state()
+        model = model or self.router.route("crew").model
+        agents = self._local.agents.get(model)
+        if agents is None:
+            agents = self._local.agents[model] = self._build_agents(model)
+        return agents
+
     def create_agents(self):
+        """Build the agents for the calling thread ahead of the first call."""
+        self._agents()
+
+    def _configured_model(self, method: str, goal_type: str = "") -> str:
+        # Cache keys use this rather than the routed model, so routing around
+        # a slow model doesn't empty the caches
+        return self.router.route(method, goal_type).model
+
+    @property
+    def form_designer(self) -> Agent:
+        return self._agents()["form_designer"]
+
+    @property
+    def researcher(self) -> Agent:
+        return self._agents()["researcher"]
+
+    @property
+    def curator(self) -> Agent:
+        return self._agents()["curator"]
+
+    @property
+    def roadmap_designer(self) -> Agent:
+        return self._agents()["roadmap_designer"]
+
+    def _build_agents(self, model: str) -> Dict[str, Agent]:
+        from crewai import Agent
+
         # Form Designer Agent
-        self.form_designer = Agent(
+        form_designer = Agent(
             role='Form Design Specialist',
             goal='Create comprehensive and user-friendly onboarding questionnaires',
             backstory=dedent("""
@@ -17,12 +123,13 @@ class RoadmapCrew:
                 You understand how to gather relevant information while keeping forms
                 concise and user-friendly.
             """),
-            verbose=True,
-            allow_delegation=False
+            verbose=self.verbose,
+            allow_delegation=False,
+            llm=model
         )
-        
+
         # Research Specialist Agent
-        self.researcher = Agent(
+        researcher = Agent(
             role='Research Specialist',
             goal='Analyze learning paths and gather comprehensive information',
             backstory=dedent("""
@@ -30,12 +137,13 @@ class RoadmapCrew:
                 structured learning paths. You understand various learning domains
                 and can identify key components for success.
             """),
-            verbose=True,
-            allow_delegation=False
+            verbose=self.verbose,
+            allow_delegation=False,
+            llm=model
         )
-        
+
         # Resource Curator Agent
-        self.curator = Agent(
+        curator = Agent(
             role='Resource Curator',
             goal='Curate high-quality learning resources and materials',
             backstory=dedent("""
@@ -43,12 +151,13 @@ class RoadmapCrew:
                 You know how to match resources to different learning styles and
                 skill levels.
             """),
-            verbose=True,
-            allow_delegation=False
+            verbose=self.verbose,
+            allow_delegation=False,
+            llm=model
         )
-        
+
         # Roadmap Designer Agent
-        self.roadmap_designer = Agent(
+        roadmap_designer = Agent(
             role='Roadmap Designer',
             goal='Create personalized learning journeys with clear milestones',
             backstory=dedent("""
@@ -56,59 +165,157 @@ class RoadmapCrew:
                 progression. You know how to break down complex goals into
                 manageable steps.
             """),
-            verbose=True,
-            allow_delegation=False
+            verbose=self.verbose,
+            allow_delegation=False,
+            llm=model
         )
 
-    def get_onboarding_questions(self, goal_type: str) -> Dict:
-        """Generate onboarding questions based on goal type."""
-        
+        return {
+            "form_designer": form_designer,
+            "researcher": researcher,
+            "curator": curator,
+            "roadmap_designer": roadmap_designer,
+        }
+
+    def _crew(self, name: str, model: str) -> Crew:
+        """Return the calling thread's crew for a flow and model, building it on first use."""
+        agents = self._agents(model)
+        crews = self._local.crews
+        if (name, model) not in crews:
+            builder = getattr(self, f"_build_{name}_crew")
+            crews[(name, model)] = builder(agents)
+        return crews[(name, model)]
+
+    def _run_crew(self, name: str, model: str, inputs: Dict[str, str]):
+        """Kick off the calling thread's crew; return the result and per-task timings."""
+        crew = self._crew(name, model)
+        finished = {}
+        for task in crew.tasks:
+            task.callback = lambda output, task=task: finished.setdefault(task.name, time.perf_counter())
+
+        started = time.perf_counter()
+        result = crew.kickoff(inputs=inputs)
+        ended = time.perf_counter()
+        return result, self._task_timings(crew.tasks, finished, started, ended)
+
+    def _kickoff(self, name: str, inputs: Dict[str, str]) -> Dict:
+        """Run a reusable crew with retries/hedging and record per-task wall time."""
+        method, goal_type = f"crew.{name}", inputs.get("goal_type", "")
+        model = self.router.choose(method, goal_type).model
+        with self.instrumentation.span(method, goal_type, model) as record:
+            # Hedged attempts run on other threads, which use their own crews
+            result, timings = self.resilience.call_sync(
+                lambda: self._run_crew(name, model, inputs), method, record
+            )
+            self._thread_state()
+            self._local.timings = timings
+            record.set_usage(getattr(result, "token_usage", None))
+            # Crew output often wraps the JSON in prose or fences
+            try:
+                parsed = repair_json(str(result))
+            except ValueError:
+                record.parse_failure = True
+                raise
+            record.repaired = parsed.repaired
+            if parsed.truncated:
+                # Don't let a partial roadmap into the caches
+                record.truncated = True
+                raise TruncatedOutputError(f"{method} output was cut off")
+            return parsed.value
+
+    @staticmethod
+    def _task_timings(tasks: List[Task], finished: Dict[str, float],
+                      started: float, ended: float) -> Dict[str, float]:
+        """Estimate each task's wall time from completion times.
+
+        A task is taken to start when the previous synchronous task and all of
+        its context tasks have finished.
+        """
+        timings = {}
+        previous_sync_end = started
+        for task in tasks:
+            end = finished.get(task.name, ended)
+            ready = previous_sync_end
+            # Newer crewai uses a sentinel rather than None for "no context"
+            context = task.context if isinstance(task.context, list) else []
+            for dependency in context:
+                ready = max(ready, finished.get(dependency.name, started))
+            timings[task.name] = end - ready
+            if not task.async_execution:
+                previous_sync_end = end
+        timings["total"] = ended - started
+        return timings
+
+    def last_task_timings(self) -> Dict[str, float]:
+        """Per-task wall time (seconds) of the calling thread's most recent crew run."""
+        self._thread_state()
+        return dict(self._local.timings)
+
+    def _build_questions_crew(self, agents: Dict[str, Agent]) -> Crew:
+        from crewai import Crew, Process, Task
+
         question_generation_task = Task(
-            description=dedent(f"""
-                Create a comprehensive set of onboarding questions for a {goal_type} goal.
-                
-                Include questions about:
-                1. Current experience and background
-                2. Learning preferences and style
-                3. Time availability and constraints
-                4. Specific goals and objectives
-                5. Resource preferences and limitations
-                
-                Format the response as a JSON object with fields array where each field has:
-                - id: string
-                - label: string
-                - type: "text" | "number" | "select" | "multiselect"
-                - required: boolean
-                - category: string
-                - options: string[] (for select/multiselect)
-                - validation: object (if needed)
-                - helpText: string
-                - order: number
-                
-                Ensure questions are relevant to {goal_type} specifically.
-            """),
-            agent=self.form_designer
+            name="question_generation",
+            # Task descriptions are interpolated with kickoff inputs, so no literal braces here
+            description=(
+                "Create onboarding questions for a {goal_type} goal, covering: " + QUESTION_TOPICS + ".\n"
+                "Return minified JSON with a fields array; each field has id, label, "
+                "type (text|number|select|multiselect), required, category, options (select/multiselect only), "
+                "validation (number only), helpText and order."
+            ),
+            expected_output="A JSON object with a fields array.",
+            agent=agents["form_designer"]
         )
 
-        crew = Crew(
-            agents=[self.form_designer],
+        return Crew(
+            agents=[agents["form_designer"]],
             tasks=[question_generation_task],
-            verbose=True,
-            process=Process.sequential
+            verbose=self.verbose,
+            process=Process.sequential,
+            max_rpm=self.max_rpm
         )
 
-        result = crew.kickoff()
-        return json.loads(result)
+    def get_onboarding_questions(self, goal_type: str) -> Dict:
+        """Generate onboarding questions based on goal type."""
+        return self._kickoff("questions", {"goal_type": goal_type})
+
+    def generate_roadmap(self, goal_type: str, user_responses: Dict, refresh: bool = False) -> Dict:
+        """Return a roadmap for the profile, served from cache when possible."""
+        mode = "parallel" if self.parallel else "sequential"
+        model = self._configured_model(f"crew.roadmap_{mode}", goal_type)
+        key = profile_key(goal_type, user_responses, f"{CREW_PROMPT_VERSION}-{mode}", model)
+        if not refresh:
+            cached = self.roadmap_cache.get(key)
+            if cached is not None:
+                self.instrumentation.emit(CallRecord(
+                    method=f"crew.roadmap_{mode}", goal_type=goal_type, model=model, cache_hit=True
+                ))
+                return cached
+
+        try:
+            roadmap = self._kickoff(f"roadmap_{mode}", {
+                "goal_type": goal_type,
+                "user_profile": compact_json(prune_responses(user_responses)),
+            })
+        except CircuitOpenError:
+            stale = self.roadmap_cache.get_stale(key)
+            if stale is None:
+                raise
+            self.resilience.note_fallback()
+            return stale
+        self.roadmap_cache.set(key, roadmap)
+        return roadmap
 
-    def generate_roadmap(self, goal_type: str, user_responses: Dict) -> Dict:
-        """Generate complete roadmap based on goal type and user responses."""
-        
-        # Research Task
-        research_task = Task(
-            description=dedent(f"""
+    @staticmethod
+    def _research_task(agents: Dict[str, Agent]) -> Task:
+        from crewai import Task
+
+        return Task(
+            name="research",
+            description=dedent("""
                 Analyze the learning requirements for {goal_type} based on user responses:
-                {json.dumps(user_responses, indent=2)}
-                
+                {user_profile}
+
                 Provide research results as JSON with:
                 - required_skills: string[]
                 - prerequisites: string[]
@@ -116,87 +323,215 @@ class RoadmapCrew:
                 - industry_standards: string[]
                 - common_challenges: object[]
             """),
-            agent=self.researcher
+            expected_output="A JSON object with the research results.",
+            agent=agents["researcher"]
         )
 
-        # Resource Curation Task
+    @staticmethod
+    def _roadmap_task(agents: Dict[str, Agent], context: List[Task]) -> Task:
+        from crewai import Task
+
+        return Task(
+            name="roadmap_design",
+            description=dedent("""
+                Create a comprehensive roadmap using the research and resources.
+                Include clear milestones, timelines, and checkpoints.
+
+                Format as JSON with nodes (learning modules) and edges (prerequisites).
+            """),
+            expected_output="A JSON object with nodes and edges.",
+            agent=agents["roadmap_designer"],
+            context=context
+        )
+
+    def _build_roadmap_sequential_crew(self, agents: Dict[str, Agent]) -> Crew:
+        from crewai import Crew, Process, Task
+
+        research_task = self._research_task(agents)
+
         resource_task = Task(
+            name="resource_curation",
             description=dedent("""
                 Based on the research results, curate learning resources.
                 Include various types of resources like courses, tutorials,
                 documentation, and practice exercises.
-                
+
                 Format as JSON with categorized resources.
             """),
-            agent=self.curator
+            expected_output="A JSON object with categorized resources.",
+            agent=agents["curator"],
+            context=[research_task]
         )
 
-        # Roadmap Design Task
-        roadmap_task = Task(
-            description=dedent("""
-                Create a comprehensive roadmap using the research and resources.
-                Include clear milestones, timelines, and checkpoints.
-                
-                Format as JSON with nodes (learning modules) and edges (prerequisites).
-            """),
-            agent=self.roadmap_designer
-        )
+        roadmap_task = self._roadmap_task(agents, [research_task, resource_task])
 
-        crew = Crew(
-            agents=[self.researcher, self.curator, self.roadmap_designer],
+        return Crew(
+            agents=[agents["researcher"], agents["curator"], agents["roadmap_designer"]],
             tasks=[research_task, resource_task, roadmap_task],
-            verbose=True,
-            process=Process.sequential
+            verbose=self.verbose,
+            process=Process.sequential,
+            max_rpm=self.max_rpm
         )
 
-        result = crew.kickoff()
-        return json.loads(result)
+    def _build_roadmap_parallel_crew(self, agents: Dict[str, Agent]) -> Crew:
+        from crewai import Crew, Process, Task
+
+        research_task = self._research_task(agents)
+
+        # An agent keeps one executor that each task rewires, so tasks running
+        # concurrently need an agent each
+        curators = {category: agents["curator"].copy() for category in RESOURCE_CATEGORIES}
+
+        # One curation task per category; they only depend on the research
+        curation_tasks = [
+            Task(
+                name=f"resource_curation_{category}",
+                description=dedent(f"""
+                    Based on the research results, curate {category} for {{goal_type}}
+                    matched to the user's level and learning style.
+
+                    Format as JSON with a "{category}" array.
+                """),
+                expected_output=f"A JSON object with a {category} array.",
+                agent=curators[category],
+                context=[research_task],
+                async_execution=True
+            )
+            for category in RESOURCE_CATEGORIES
+        ]
+
+        roadmap_task = self._roadmap_task(agents, [research_task] + curation_tasks)
+
+        return Crew(
+            agents=[agents["researcher"], *curators.values(), agents["roadmap_designer"]],
+            tasks=[research_task] + curation_tasks + [roadmap_task],
+            verbose=self.verbose,
+            process=Process.sequential,
+            max_rpm=self.max_rpm
+        )
+
+    def _build_validation_crew(self, agents: Dict[str, Agent]) -> Crew:
+        from crewai import Crew, Process, Task
 
-    def validate_milestone(self, milestone_data: Dict) -> Dict:
-        """Generate validation questions for a milestone."""
-        
         validation_task = Task(
-            description=dedent(f"""
+            name="milestone_validation",
+            description=dedent("""
                 Create validation questions and tasks for the milestone:
-                {json.dumps(milestone_data, indent=2)}
-                
+                {milestone}
+
                 Include:
                 1. Knowledge assessment questions
                 2. Practical tasks
                 3. Project requirements
                 4. Skill demonstration criteria
-                
+
                 Format as JSON with comprehensive validation criteria.
             """),
-            agent=self.roadmap_designer
+            expected_output="A JSON object with validation criteria.",
+            agent=agents["roadmap_designer"]
         )
 
-        crew = Crew(
-            agents=[self.roadmap_designer],
+        return Crew(
+            agents=[agents["roadmap_designer"]],
             tasks=[validation_task],
-            verbose=True,
-            process=Process.sequential
+            verbose=self.verbose,
+            process=Process.sequential,
+            max_rpm=self.max_rpm
         )
 
-        result = crew.kickoff()
-        return json.loads(result)
+    def validate_milestone(self, milestone_data: Dict) -> Dict:
+        """Generate validation questions for a milestone (a dict or a models.Milestone)."""
+        return self._kickoff("validation", {"milestone": compact_json(_milestone_data(milestone_data))})
+
+    def milestone_key(self, milestone_data: Dict) -> str:
+        """Content hash of a milestone, so identical milestones share one validation."""
+        canonical = json.dumps({
+            "milestone": _milestone_data(milestone_data),
+            "prompt_version": CREW_PROMPT_VERSION,
+            "model": self._configured_model("crew.validation"),
+        }, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _cached_validation(self, key: str, milestone_data: Dict) -> Dict:
+        cached = self.validation_cache.get(key)
+        if cached is not None:
+            self.instrumentation.emit(CallRecord(
+                method="crew.validation", goal_type="", model=self._configured_model("crew.validation"), cache_hit=True
+            ))
+            return cached
+        try:
+            validation = self.validate_milestone(milestone_data)
+        except CircuitOpenError:
+            stale = self.validation_cache.get_stale(key)
+            if stale is None:
+                raise
+            self.resilience.note_fallback()
+            return stale
+        self.validation_cache.set(key, validation)
+        return validation
+
+    def validate_milestones(self, milestones: Sequence[Dict], max_workers: int = 4) -> List[Dict]:
+        """Validate every milestone of a roadmap concurrently.
+
+        Milestones may be dicts or models.Milestone (as in Roadmap.milestones).
+        Returns one result per milestone, in order: {"validation": ...} or
+        {"error": "..."} when that milestone failed, without failing the
+        others. Validations are cached by milestone_key, and duplicates within
+        the batch run once. At most max_workers crews run at a time; each
+        worker thread reuses its own crew.
+        """
+        keys: List[Optional[str]] = []
+        unique: Dict[str, Dict] = {}
+        invalid: Dict[int, Dict] = {}
+        for index, milestone in enumerate(milestones):
+            try:
+                data = _milestone_data(milestone)
+                key = self.milestone_key(data)
+            except Exception as e:
+                # e.g. not JSON-serializable; only this milestone fails
+                invalid[index] = {"error": f"{type(e).__name__}: {e}"}
+                keys.append(None)
+                continue
+            keys.append(key)
+            unique.setdefault(key, data)
+
+        def validate(key: str) -> Dict:
+            try:
+                return {"validation": self._cached_validation(key, unique[key])}
+            except Exception as e:
+                return {"error": f"{type(e).__name__}: {e}"}
+
+        if len(unique) <= 1:
+            results = {key: validate(key) for key in unique}
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(unique)),
+                                    thread_name_prefix="crew-validation") as pool:
+                results = dict(zip(unique, pool.map(validate, unique)))
+        return [dict(invalid[index] if key is None else results[key]) for index, key in enumerate(keys)]
 
 # Usage Example
 if __name__ == "__main__":
+    import logging
     import os
     from dotenv import load_dotenv
-    
+    from instrumentation import LoggingSink
+
     load_dotenv()
-    
+    logging.basicConfig(level=logging.INFO)
+
     # Initialize crew
-    roadmap_crew = RoadmapCrew(openai_api_key=os.getenv("OPENAI_API_KEY"))
+    roadmap_crew = RoadmapCrew(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        parallel=True,
+        instrumentation=Instrumentation([LoggingSink()])
+    )
     roadmap_crew.create_agents()
-    
+
     # Test onboarding questions
     questions = roadmap_crew.get_onboarding_questions("python_programming")
     print("\nOnboarding Questions:")
     print(json.dumps(questions, indent=2))
-    
+
     # Test roadmap generation
     user_responses = {
         "experience_level": "beginner",
@@ -204,7 +539,9 @@ if __name__ == "__main__":
         "learning_style": ["video", "interactive"],
         "goal": "Build web applications with Python"
     }
-    
+
     roadmap = roadmap_crew.generate_roadmap("python_programming", user_responses)
     print("\nRoadmap:")
-    print(json.dumps(roadmap, indent=2))
\ No newline at end of file
+    print(json.dumps(roadmap, indent=2))
+    print("\nTask timings (s):")
+    print(json.dumps(roadmap_crew.last_task_timings(), indent=2))
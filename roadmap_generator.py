@@ -1,124 +1,651 @@
 # roadmap_generator.py
-from openai import OpenAI
-import json
-from typing import Dict, List
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
-class RoadmapGenerator:
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
-
-    def get_onboarding_questions(self, goal_type: str) -> Dict:
-        """Generate onboarding questions based on goal type."""
-        prompt = f"""
-        Create a comprehensive set of onboarding questions for a {goal_type} goal.
-        
-        Include questions about:
-        1. Current experience and background
-        2. Learning preferences and style
-        3. Time availability and constraints
-        4. Specific goals and objectives
-        5. Resource preferences and limitations
-        
-        Format the response as a JSON object with fields array where each field has:
-        - id: string
-        - label: string
-        - type: "text" | "number" | "select" | "multiselect"
-        - required: boolean
-        - category: string
-        - options: string[] (for select/multiselect)
-        - validation: object (if needed)
-        - helpText: string
-        - order: number
-        
-        Ensure questions are relevant to {goal_type} specifically.
-        Return only the JSON object, no additional text.
-        """
+import prompts
+import sections
+from cache import DEFAULT_CACHE_DIR, DEFAULT_ROADMAP_TTL, DiskCache, LRUCache, TieredCache, profile_key
+from instrumentation import CallRecord, Instrumentation, logger
+from jsonrepair import TruncatedOutputError, repair_json, strip_leading_fence
+from models import Roadmap, typed_section
+from resilience import CircuitOpenError, Resilience
+from router import ModelRouter, default_router
+from singleflight import SingleFlight
+from streaming import (
+    ROADMAP_STREAM_PATHS, IncrementalJSONParser, RoadmapSection, section_from_path
+)
+
+if TYPE_CHECKING:
+    # numpy, like openai, is only imported once it's needed
+    from semantic_cache import SemanticCache
+
+# Bump when a prompt changes so cached results for it are regenerated.
+QUESTIONS_PROMPT_VERSION = "2"
+ROADMAP_PROMPT_VERSION = "2"
+SECTIONED_PROMPT_VERSION = "sectioned-2"
+
+DEFAULT_QUESTIONS_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 120.0
+
+T = TypeVar("T")
 
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": "You are a form design specialist who creates effective questionnaires."},
-                {"role": "user", "content": prompt}
-            ]
+async def _gather_or_cancel(*aws: Awaitable) -> List:
+    """Like asyncio.gather, but cancel the remaining work as soon as one fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+class AsyncRoadmapGenerator:
+    """Roadmap generation on the async OpenAI client with bounded concurrency.
+
+    At most max_concurrency completions are in flight at once; each call is
+    bounded by timeout seconds (overridable per call) and can be cancelled by
+    cancelling the awaiting task. Each call's model is picked by `router`.
+    """
+
+    def __init__(self, api_key: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 questions_ttl: Optional[float] = DEFAULT_QUESTIONS_TTL,
+                 roadmap_ttl: Optional[float] = DEFAULT_ROADMAP_TTL,
+                 roadmap_cache_size: int = 256,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 instrumentation: Optional[Instrumentation] = None,
+                 resilience: Optional[Resilience] = None,
+                 semantic_cache: Optional["SemanticCache"] = None,
+                 base_url: Optional[str] = None,
+                 router: Optional[ModelRouter] = None):
+        # base_url points the client at any OpenAI-compatible server, e.g. benchmarks/mock_openai.py
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.instrumentation = instrumentation or Instrumentation()
+        self.resilience = resilience or Resilience()
+        # Picks each call's model; as a sink it sees every call's latency and parse result
+        self.router = router or default_router()
+        if self.router not in self.instrumentation.sinks:
+            self.instrumentation.add_sink(self.router)
+        self.question_cache = DiskCache(cache_dir, "questions", ttl=questions_ttl)
+        self.roadmap_cache = TieredCache(
+            LRUCache(maxsize=roadmap_cache_size),
+            DiskCache(cache_dir, "roadmaps", ttl=roadmap_ttl)
         )
-        
-        return json.loads(response.choices[0].message.content)
-
-    def generate_roadmap(self, goal_type: str, user_responses: Dict) -> Dict:
-        """Generate complete roadmap based on goal type and user responses."""
-        prompt = f"""
-        Create a comprehensive learning roadmap for: {goal_type}
-        
-        User Profile:
-        {json.dumps(user_responses, indent=2)}
-        
-        Create a complete roadmap including:
-        1. Research insights about the learning path
-        2. Curated resources (courses, tutorials, documentation)
-        3. Milestones with clear progression
-        
-        Return a JSON object with this exact structure:
-        {{
-          "research_insights": {{
-            "key_concepts": [string],
-            "prerequisites": [string],
-            "learning_approach": string,
-            "estimated_duration": string
-          }},
-          "resources": {{
-            "courses": [
-              {{
-                "title": string,
-                "platform": string,
-                "url": string,
-                "duration": string,
-                "level": string
-              }}
-            ],
-            "tutorials": [
-              {{
-                "title": string,
-                "url": string,
-                "format": string
-              }}
-            ],
-            "documentation": [
-              {{
-                "title": string,
-                "url": string,
-                "type": string
-              }}
-            ]
-          }},
-          "milestones": [
-            {{
-              "title": string,
-              "description": string,
-              "duration": string,
-              "complexity": string,
-              "exercises": [
-                {{
-                  "title": string,
-                  "description": string
-                }}
-              ],
-              "checkpoints": [string]
-            }}
-          ]
-        }}
-        
-        Ensure all milestones have the exact same structure as specified above.
-        Return only the JSON object, no additional text.
+        # Opt-in: serves the nearest earlier profile's roadmap when no exact one is cached
+        self.semantic_cache = semantic_cache
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphores = {}
+        # Identical concurrent requests share one upstream call
+        self.single_flight = SingleFlight()
+
+    @property
+    def client(self):
+        """The AsyncOpenAI client, built (and openai imported) on first use.
+
+        Importing openai takes over a second, so constructing a generator
+        stays cheap and cache hits never pay for it.
         """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AsyncOpenAI
+                    # Resilience is the only retry layer, so retries are counted and rate limited
+                    self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they first wait on, so keep one per loop
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _complete_json(self, messages: List[Dict], timeout: Optional[float],
+                             method: str, goal_type: str, response_format: Dict, model: str) -> Dict:
+        """Run one JSON completion under the concurrency limit and timeout."""
+        timeout = self.timeout if timeout is None else timeout
+        async def attempt():
+            async with self._semaphore():
+                return await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        response_format=response_format,
+                        messages=messages
+                    ),
+                    timeout
+                )
+
+        with self.instrumentation.span(method, goal_type, model) as record:
+            response = await self.resilience.call(attempt, method, record)
+            record.set_usage(getattr(response, "usage", None))
+            choice = response.choices[0]
+            text = choice.message.content or ""
+            if choice.finish_reason == "length":
+                tail = await self._continuation(messages, text, timeout, method, record, model)
+                if tail is not None:
+                    text += tail
+            return self._decode(text, record)
+
+    async def _continuation(self, messages: List[Dict], partial: str, timeout: Optional[float],
+                            method: str, record: CallRecord, model: str) -> Optional[str]:
+        """Request only the missing tail of a cut-off response; None if that fails.
+
+        This is much cheaper than regenerating the whole document. If it
+        fails, decoding raises TruncatedOutputError rather than returning a
+        partial document that would then be cached.
+        """
+        async def attempt():
+            async with self._semaphore():
+                return await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        messages=prompts.continuation_messages(messages, partial)
+                    ),
+                    timeout
+                )
+
+        try:
+            response = await self.resilience.call(attempt, f"{method}.continue", record, hedge=False)
+        except Exception:
+            logger.warning("continuation request for %s failed", method, exc_info=True)
+            return None
+        record.add_usage(getattr(response, "usage", None))
+        record.continued = True
+        return strip_leading_fence(response.choices[0].message.content or "")
+
+    @staticmethod
+    def _decode(text: str, record: CallRecord):
+        try:
+            result = repair_json(text)
+        except ValueError:
+            record.parse_failure = True
+            raise
+        record.repaired = result.repaired
+        if result.truncated:
+            record.truncated = True
+            raise TruncatedOutputError("response was cut off and could not be completed")
+        return result.value
+
+    def _record_cache_hit(self, method: str, goal_type: str) -> None:
+        self.instrumentation.emit(CallRecord(
+            method=method, goal_type=goal_type, model=self._configured_model(method, goal_type), cache_hit=True
+        ))
+
+    def _stale_fallback(self, cache, key: str, error: CircuitOpenError):
+        """Serve an expired cache entry while the breaker is open, or re-raise."""
+        stale = cache.get_stale(key)
+        if stale is None:
+            raise error
+        self.resilience.note_fallback()
+        return stale
+
+    def _cached_roadmap(self, key: str) -> Optional[Roadmap]:
+        cached = self.roadmap_cache.get(key)
+        if cached is None:
+            return None
+        try:
+            return Roadmap.from_dict(cached)
+        except ValueError:
+            # Written before roadmaps were validated; regenerate it
+            self.roadmap_cache.invalidate(key)
+            return None
 
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": "You are a learning path expert who creates personalized roadmaps."},
-                {"role": "user", "content": prompt}
-            ]
+    def _text_fields(self, goal_type: str) -> Tuple[str, ...]:
+        """Ids of the goal's free-text questions; with no questions cached, every answer must match exactly."""
+        questions = self.question_cache.get(self._questions_key(goal_type)) or {}
+        return tuple(
+            field["id"] for field in questions.get("fields") or ()
+            if isinstance(field, dict) and "id" in field and field.get("type", "text") == "text"
         )
-        
-        return json.loads(response.choices[0].message.content)
\ No newline at end of file
+
+    def _similar_roadmap(self, goal_type: str, user_responses: Dict, method: str) -> Optional[Roadmap]:
+        if self.semantic_cache is None:
+            return None
+        hit = self.semantic_cache.lookup(goal_type, user_responses, self._text_fields(goal_type))
+        if hit is None:
+            return None
+        try:
+            roadmap = Roadmap.from_dict(hit[0])
+        except ValueError:
+            return None
+        self._record_cache_hit(f"{method}.semantic", goal_type)
+        return roadmap
+
+    def _store_roadmap(self, key: str, goal_type: str, user_responses: Dict, roadmap: Roadmap) -> None:
+        value = roadmap.to_dict()
+        self.roadmap_cache.set(key, value)
+        if self.semantic_cache is not None:
+            self.semantic_cache.insert(goal_type, user_responses, key, value, self._text_fields(goal_type))
+
+    def _configured_model(self, method: str, goal_type: str) -> str:
+        # Cache keys use this rather than the routed model, so routing around
+        # a slow model doesn't empty the caches
+        return self.router.route(method, goal_type).model
+
+    def _questions_key(self, goal_type: str) -> str:
+        model = self._configured_model("get_onboarding_questions", goal_type)
+        return f"{goal_type}:{QUESTIONS_PROMPT_VERSION}:{model}"
+
+    def _roadmap_key(self, goal_type: str, user_responses: Dict, version: str) -> str:
+        return profile_key(goal_type, user_responses, version, self._configured_model("generate_roadmap", goal_type))
+
+    async def get_onboarding_questions(self, goal_type: str, refresh: bool = False,
+                                       timeout: Optional[float] = None) -> Dict:
+        """Return onboarding questions for a goal type, served from cache when possible."""
+        key = self._questions_key(goal_type)
+        if not refresh:
+            cached = self.question_cache.get(key)
+            if cached is not None:
+                self._record_cache_hit("get_onboarding_questions", goal_type)
+                return cached
+
+        async def fetch() -> Dict:
+            model = self.router.choose("get_onboarding_questions", goal_type).model
+            try:
+                questions = await self._complete_json(
+                    prompts.questions_messages(goal_type, model), timeout, "get_onboarding_questions", goal_type,
+                    prompts.response_format("onboarding_questions", prompts.QUESTIONS_SCHEMA, model), model
+                )
+            except CircuitOpenError as e:
+                return self._stale_fallback(self.question_cache, key, e)
+            self.question_cache.set(key, questions)
+            return questions
+
+        return await self.single_flight.do(f"questions:{key}", fetch)
+
+    def has_cached_questions(self, goal_type: str) -> bool:
+        return self._questions_key(goal_type) in self.question_cache
+
+    def has_cached_roadmap(self, goal_type: str, user_responses: Dict, sectioned: bool = False) -> bool:
+        version = SECTIONED_PROMPT_VERSION if sectioned else ROADMAP_PROMPT_VERSION
+        return self._roadmap_key(goal_type, user_responses, version) in self.roadmap_cache
+
+    def invalidate_onboarding_questions(self, goal_type: Optional[str] = None) -> None:
+        """Drop cached questions for one goal type, or for all of them."""
+        if goal_type is None:
+            self.question_cache.invalidate()
+        else:
+            self.question_cache.invalidate(self._questions_key(goal_type))
+
+    async def warm_up(self, goal_types: List[str]) -> List[str]:
+        """Fetch questions for every goal type not cached yet; return the ones that failed."""
+        missing = [g for g in goal_types if self._questions_key(g) not in self.question_cache]
+        results = await asyncio.gather(
+            *(self.get_onboarding_questions(g) for g in missing),
+            return_exceptions=True
+        )
+        return [g for g, result in zip(missing, results) if isinstance(result, BaseException)]
+
+    def prompt_report(self, goal_type: str, user_responses: Dict,
+                      usage: Optional[List[Dict]] = None) -> List[Dict]:
+        """Input-token accounting for this generator's prompts, keyed by instrumented method name."""
+        builders = {
+            "get_onboarding_questions": functools.partial(prompts.questions_messages, goal_type),
+            "generate_roadmap": functools.partial(prompts.roadmap_messages, goal_type, user_responses),
+            "sectioned.insights": functools.partial(sections.insights_messages, goal_type, user_responses),
+            "sectioned.resources": functools.partial(sections.resources_messages, goal_type, user_responses),
+            "sectioned.outline": functools.partial(sections.outline_messages, goal_type, user_responses),
+        }
+        return prompts.token_report({
+            method: build(self._configured_model(method, goal_type)) for method, build in builders.items()
+        }, usage)
+
+    async def generate_roadmap(self, goal_type: str, user_responses: Dict, refresh: bool = False,
+                               timeout: Optional[float] = None, sectioned: bool = False) -> Roadmap:
+        """Return a roadmap for the profile, served from cache when possible.
+
+        With sectioned=True the roadmap is built from concurrent per-section
+        requests (see generate_sectioned_roadmap) instead of one long completion.
+        With a semantic_cache, a near-identical earlier profile's roadmap is
+        served when there is no exact match. Only free-text answers may differ,
+        so this needs the goal's questions cached to know which those are.
+        """
+        version = SECTIONED_PROMPT_VERSION if sectioned else ROADMAP_PROMPT_VERSION
+        key = self._roadmap_key(goal_type, user_responses, version)
+        if not refresh:
+            cached = self._cached_roadmap(key)
+            if cached is not None:
+                self._record_cache_hit("generate_roadmap", goal_type)
+                return cached
+            similar = self._similar_roadmap(goal_type, user_responses, "generate_roadmap")
+            if similar is not None:
+                return similar
+
+        async def fetch() -> Roadmap:
+            try:
+                if sectioned:
+                    roadmap = await self.generate_sectioned_roadmap(goal_type, user_responses, timeout)
+                else:
+                    model = self.router.choose("generate_roadmap", goal_type).model
+                    roadmap = await self._complete_json(
+                        prompts.roadmap_messages(goal_type, user_responses, model), timeout,
+                        "generate_roadmap", goal_type,
+                        prompts.response_format("roadmap", prompts.ROADMAP_SCHEMA, model), model
+                    )
+            except CircuitOpenError as e:
+                return Roadmap.from_dict(self._stale_fallback(self.roadmap_cache, key, e))
+            result = Roadmap.from_dict(roadmap)
+            self._store_roadmap(key, goal_type, user_responses, result)
+            return result
+
+        return await self.single_flight.do(f"roadmap:{key}", fetch)
+
+    async def generate_sectioned_roadmap(self, goal_type: str, user_responses: Dict,
+                                         timeout: Optional[float] = None) -> Dict:
+        """Generate a roadmap by fanning out section requests and merging them.
+
+        Research insights, resources and a milestone outline are requested
+        concurrently; once the outline arrives, each phase's milestones are
+        requested concurrently too. Wall time is roughly the slower of the
+        insights/resources calls and outline plus the slowest phase.
+        """
+        roadmap = sections.splice_sections({}, await self._generate_sections(
+            goal_type, user_responses, sections.SECTION_NAMES, timeout
+        ))
+        sections.validate_roadmap(roadmap)
+        return roadmap
+
+    async def _generate_sections(self, goal_type: str, user_responses: Dict, names: Sequence[str],
+                                 timeout: Optional[float]) -> Dict:
+        """Generate the named roadmap sections concurrently, keyed by name."""
+        async def section(name: str, schema: str, messages: Callable[[str], List[Dict]]) -> Dict:
+            """Request one section; messages builds the prompt for the routed model."""
+            method = f"sectioned.{name}"
+            model = self.router.choose(method, goal_type).model
+            return await self._complete_json(
+                messages(model), timeout, method, goal_type, sections.response_format(schema, model), model
+            )
+
+        async def research_insights() -> Dict:
+            response = await section(
+                "insights", "insights", functools.partial(sections.insights_messages, goal_type, user_responses)
+            )
+            return response.get("research_insights") or {}
+
+        async def resources() -> Dict:
+            response = await section(
+                "resources", "resources", functools.partial(sections.resources_messages, goal_type, user_responses)
+            )
+            return response.get("resources") or {}
+
+        async def milestones() -> List[Dict]:
+            outline = await section(
+                "outline", "outline", functools.partial(sections.outline_messages, goal_type, user_responses)
+            )
+            phases = outline.get("phases") or []
+            return sections.merge_phases(await _gather_or_cancel(*(
+                section("phase", "milestones",
+                        functools.partial(sections.phase_messages, goal_type, user_responses, outline, index))
+                for index in range(len(phases))
+            )))
+
+        builders = {"research_insights": research_insights, "resources": resources, "milestones": milestones}
+        values = await _gather_or_cancel(*(builders[name]() for name in names))
+        return dict(zip(names, values))
+
+    async def regenerate_roadmap(self, goal_type: str, user_responses: Dict, previous: Roadmap,
+                                 previous_responses: Dict, categories: Optional[Dict[str, str]] = None,
+                                 timeout: Optional[float] = None) -> Roadmap:
+        """Update a roadmap for edited answers, regenerating only the sections they affect.
+
+        The new answers are diffed against previous_responses, the answers
+        behind `previous`. Sections that don't depend on a changed field (see
+        sections.affected_sections; categories maps field ids to their
+        question category) are reused as they are. A roadmap already cached
+        for the new answers is returned instead, and a changed goal type
+        regenerates everything. The result is cached under the new answers.
+        """
+        if previous_responses.get("goal_type", goal_type) != goal_type:
+            return await self.generate_roadmap(goal_type, user_responses, timeout=timeout)
+
+        changed = [
+            field for field in sections.changed_fields(previous_responses, user_responses)
+            if field not in prompts.IGNORED_RESPONSE_FIELDS
+        ]
+        names = sections.affected_sections(changed, categories) if changed else ()
+        if names:
+            for version in (ROADMAP_PROMPT_VERSION, SECTIONED_PROMPT_VERSION):
+                cached = self._cached_roadmap(self._roadmap_key(goal_type, user_responses, version))
+                if cached is not None:
+                    self._record_cache_hit("regenerate_roadmap", goal_type)
+                    return cached
+
+        for name in sections.SECTION_NAMES:
+            if name not in names:
+                self._record_cache_hit(f"incremental.{name}", goal_type)
+        if not names:
+            return previous
+
+        key = self._roadmap_key(goal_type, user_responses, ROADMAP_PROMPT_VERSION)
+        try:
+            regenerated = await self._generate_sections(goal_type, user_responses, names, timeout)
+        except CircuitOpenError as e:
+            return Roadmap.from_dict(self._stale_fallback(self.roadmap_cache, key, e))
+        result = Roadmap.from_dict(sections.splice_sections(previous.to_dict(), regenerated))
+        self._store_roadmap(key, goal_type, user_responses, result)
+        return result
+
+    async def stream_roadmap(self, goal_type: str, user_responses: Dict, refresh: bool = False,
+                             timeout: Optional[float] = None) -> AsyncIterator[RoadmapSection]:
+        """Yield roadmap sections as they stream in, then the complete roadmap.
+
+        Research insights arrive first, then each resource and each milestone,
+        and finally a "roadmap" section holding the whole Roadmap. Section data
+        are the matching models; sections that don't fit the schema are
+        skipped. The timeout bounds the whole stream, not each chunk.
+        """
+        key = self._roadmap_key(goal_type, user_responses, ROADMAP_PROMPT_VERSION)
+        if not refresh:
+            cached = self._cached_roadmap(key)
+            if cached is not None:
+                self._record_cache_hit("stream_roadmap", goal_type)
+            else:
+                cached = self._similar_roadmap(goal_type, user_responses, "stream_roadmap")
+            if cached is not None:
+                for section in cached.sections():
+                    yield section
+                return
+
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(deadline - loop.time(), 0)
+
+        model = self.router.choose("stream_roadmap", goal_type).model
+        messages = prompts.roadmap_messages(goal_type, user_responses, model)
+        parser = IncrementalJSONParser(ROADMAP_STREAM_PATHS)
+        with self.instrumentation.span("stream_roadmap", goal_type, model) as record:
+            started = loop.time()
+            async def open_stream():
+                return await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        response_format=prompts.response_format("roadmap", prompts.ROADMAP_SCHEMA, model),
+                        messages=messages,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    ),
+                    remaining()
+                )
+
+            async with self._semaphore():
+                # Only opening the stream is retried; a stream can't be hedged
+                stream = await self.resilience.call(open_stream, "stream_roadmap", record, hedge=False)
+                chunks = stream.__aiter__()
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), remaining())
+                        except StopAsyncIteration:
+                            break
+                        if getattr(chunk, "usage", None) is not None:
+                            record.set_usage(chunk.usage)
+                        if not chunk.choices:
+                            continue
+                        content = chunk.choices[0].delta.content
+                        if content and record.ttft is None:
+                            record.ttft = loop.time() - started
+                        for section in self._typed_sections(parser.feed(content)):
+                            yield section
+                finally:
+                    await stream.close()
+
+            if parser.text and not parser.done:
+                # Cut off: fetch the rest and keep emitting the sections it completes
+                tail = await self._continuation(messages, parser.text, remaining(), "stream_roadmap", record, model)
+                if tail is not None:
+                    for section in self._typed_sections(parser.feed(tail)):
+                        yield section
+            try:
+                roadmap = Roadmap.from_dict(self._decode(parser.text, record))
+            except ValueError:
+                record.parse_failure = True
+                raise
+        self._store_roadmap(key, goal_type, user_responses, roadmap)
+        yield RoadmapSection("roadmap", roadmap)
+
+    @staticmethod
+    def _typed_sections(completed: List) -> Iterator[RoadmapSection]:
+        for path, value in completed:
+            section = typed_section(section_from_path(path, value))
+            if section is not None:
+                yield section
+
+
+class RoadmapGenerator:
+    """Blocking facade over AsyncRoadmapGenerator.
+
+    Coroutines run on a private event loop thread, so one instance can be
+    shared by many threads (e.g. Streamlit sessions) and still be bounded by
+    the async generator's concurrency limit.
+    """
+
+    def __init__(self, api_key: str, **kwargs):
+        self.async_generator = AsyncRoadmapGenerator(api_key, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="roadmap-generator", daemon=True)
+        self._thread.start()
+
+    @property
+    def question_cache(self) -> DiskCache:
+        return self.async_generator.question_cache
+
+    @property
+    def roadmap_cache(self) -> TieredCache:
+        return self.async_generator.roadmap_cache
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        return self.async_generator.single_flight
+
+    @property
+    def semantic_cache(self) -> Optional["SemanticCache"]:
+        return self.async_generator.semantic_cache
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        return self.async_generator.instrumentation
+
+    @property
+    def router(self) -> ModelRouter:
+        return self.async_generator.router
+
+    @property
+    def resilience(self) -> Resilience:
+        return self.async_generator.resilience
+
+    def _submit(self, coro: Awaitable[T]) -> "Future[T]":
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _run(self, coro: Awaitable[T]) -> T:
+        future = self._submit(coro)
+        try:
+            return future.result()
+        except BaseException:
+            # Propagate interrupts and caller-side failures to the coroutine
+            future.cancel()
+            raise
+
+    def get_onboarding_questions(self, goal_type: str, refresh: bool = False,
+                                 timeout: Optional[float] = None) -> Dict:
+        """Return onboarding questions for a goal type, served from cache when possible."""
+        return self._run(self.async_generator.get_onboarding_questions(goal_type, refresh, timeout))
+
+    def submit_onboarding_questions(self, goal_type: str, refresh: bool = False,
+                                    timeout: Optional[float] = None) -> "Future[Dict]":
+        """Start fetching questions in the background; cancelling the future cancels the call."""
+        return self._submit(self.async_generator.get_onboarding_questions(goal_type, refresh, timeout))
+
+    def has_cached_questions(self, goal_type: str) -> bool:
+        return self.async_generator.has_cached_questions(goal_type)
+
+    def invalidate_onboarding_questions(self, goal_type: Optional[str] = None) -> None:
+        """Drop cached questions for one goal type, or for all of them."""
+        self.async_generator.invalidate_onboarding_questions(goal_type)
+
+    def warm_up(self, goal_types: List[str]) -> List[str]:
+        """Fetch questions for every goal type not cached yet; return the ones that failed."""
+        return self._run(self.async_generator.warm_up(goal_types))
+
+    def prompt_report(self, goal_type: str, user_responses: Dict,
+                      usage: Optional[List[Dict]] = None) -> List[Dict]:
+        """Input-token accounting for this generator's prompts, keyed by instrumented method name."""
+        return self.async_generator.prompt_report(goal_type, user_responses, usage)
+
+    def generate_roadmap(self, goal_type: str, user_responses: Dict, refresh: bool = False,
+                         timeout: Optional[float] = None, sectioned: bool = False) -> Roadmap:
+        """Return a roadmap for the profile, served from cache when possible."""
+        return self._run(self.async_generator.generate_roadmap(
+            goal_type, user_responses, refresh, timeout, sectioned
+        ))
+
+    def submit_roadmap(self, goal_type: str, user_responses: Dict, refresh: bool = False,
+                       timeout: Optional[float] = None, sectioned: bool = False) -> "Future[Roadmap]":
+        """Start generating a roadmap in the background; cancelling the future cancels the call."""
+        return self._submit(self.async_generator.generate_roadmap(
+            goal_type, user_responses, refresh, timeout, sectioned
+        ))
+
+    def has_cached_roadmap(self, goal_type: str, user_responses: Dict, sectioned: bool = False) -> bool:
+        return self.async_generator.has_cached_roadmap(goal_type, user_responses, sectioned)
+
+    def regenerate_roadmap(self, goal_type: str, user_responses: Dict, previous: Roadmap,
+                           previous_responses: Dict, categories: Optional[Dict[str, str]] = None,
+                           timeout: Optional[float] = None) -> Roadmap:
+        """Update a roadmap for edited answers, regenerating only the sections they affect."""
+        return self._run(self.async_generator.regenerate_roadmap(
+            goal_type, user_responses, previous, previous_responses, categories, timeout
+        ))
+
+    def stream_roadmap(self, goal_type: str, user_responses: Dict, refresh: bool = False,
+                       timeout: Optional[float] = None) -> Iterator[RoadmapSection]:
+        """Yield roadmap sections as they stream in, then the complete roadmap."""
+        sections = self.async_generator.stream_roadmap(goal_type, user_responses, refresh, timeout)
+        try:
+            while True:
+                try:
+                    yield self._run(sections.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(sections.aclose())
+
+    def close(self) -> None:
+        """Stop the event loop thread."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
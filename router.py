@@ -0,0 +1,225 @@
+# router.py
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from instrumentation import CallRecord, logger
+
+# Models ordered from fastest to most capable; fallback moves left, escalation right.
+DEFAULT_TIERS = ("gpt-4o-mini", "gpt-4o", "gpt-4-turbo-preview")
+DEFAULT_MODEL = "gpt-4-turbo-preview"
+
+# Onboarding questions and crew flows don't need the flagship model
+DEFAULT_ROUTES = {
+    "default": DEFAULT_MODEL,
+    "get_onboarding_questions": "gpt-4o-mini",
+    "crew": "gpt-4o-mini",
+}
+
+DEFAULT_ROUTES_PATH = os.environ.get("PATHFORGE_ROUTES")
+
+# Failed calls say nothing about a model, except for timeouts and unparseable output
+_TIMEOUT_ERRORS = {"TimeoutError", "APITimeoutError"}
+
+
+@dataclass
+class Route:
+    """Where one method (optionally for one goal type) goes.
+
+    slo is a latency target in seconds for the route's p95; without one the
+    route never falls back for speed. A model whose recent parse-failure
+    rate exceeds max_parse_failure_rate is escalated past.
+    """
+    __slots__ = ("model", "slo", "max_parse_failure_rate")
+    model: str
+    slo: Optional[float]
+    max_parse_failure_rate: float
+
+    @classmethod
+    def from_config(cls, name: str, value: Any, max_parse_failure_rate: float) -> "Route":
+        if isinstance(value, str):
+            value = {"model": value}
+        if not isinstance(value, dict) or not isinstance(value.get("model"), str) or not value["model"]:
+            raise ValueError(f"Invalid route {name!r}: expected a model name or an object with a model")
+        slo = value.get("slo")
+        if slo is not None and (not isinstance(slo, (int, float)) or isinstance(slo, bool) or slo <= 0):
+            raise ValueError(f"Invalid route {name!r}: slo must be a positive number of seconds")
+        rate = value.get("max_parse_failure_rate", max_parse_failure_rate)
+        if not isinstance(rate, (int, float)) or isinstance(rate, bool) or not 0 <= rate <= 1:
+            raise ValueError(f"Invalid route {name!r}: max_parse_failure_rate must be between 0 and 1")
+        return cls(value["model"], slo, rate)
+
+
+class RouteDecision(NamedTuple):
+    """The model picked for one call and why."""
+    method: str
+    goal_type: str
+    model: str
+    preferred: str
+    reason: str
+    at: float
+
+
+class ModelStats(NamedTuple):
+    samples: int
+    latency_p50: Optional[float]
+    latency_p95: Optional[float]
+    parse_failure_rate: Optional[float]
+
+
+class ModelRouter:
+    """Picks a model per call from configured routes and observed behaviour.
+
+    Routes are looked up by "method:goal_type", then method, then the
+    method's family (the part before the first dot, e.g. "sectioned" or
+    "crew"), then "default". The router is an instrumentation sink: it keeps
+    each model's recent latencies and parse failures per method, and
+
+      - escalates to the next more capable tier while the preferred model's
+        parse-failure rate is over the route's limit
+      - falls back to the nearest faster tier whose p95 meets the route's
+        SLO while the chosen model's p95 is over it
+
+    Samples older than window_seconds are dropped, so a model that was
+    routed around gets traffic again once its bad samples age out. Models
+    with fewer than min_samples recent calls count as healthy. Cache keys
+    should use route().model, which only changes with the config.
+
+    decisions() and stats() expose what was routed where and why.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Any]] = None, tiers: Sequence[str] = DEFAULT_TIERS,
+                 max_parse_failure_rate: float = 0.2, min_samples: int = 10, window: int = 200,
+                 window_seconds: float = 600.0, history: int = 1000):
+        routes = DEFAULT_ROUTES if routes is None else routes
+        if "default" not in routes:
+            raise ValueError("Invalid routes: a 'default' route is required")
+        self.routes = {
+            name: Route.from_config(name, value, max_parse_failure_rate) for name, value in routes.items()
+        }
+        self.tiers = tuple(tiers)
+        self.min_samples = min_samples
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        # (model, method) -> (finished_at, latency, parse_failure)
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, float, bool]]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+        self._decisions: Deque[RouteDecision] = deque(maxlen=history)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "ModelRouter":
+        """Build a router from a dict shaped like the constructor's arguments, e.g.
+
+            {"routes": {"default": {"model": "gpt-4-turbo-preview", "slo": 20},
+                        "get_onboarding_questions": "gpt-4o-mini",
+                        "generate_roadmap:data_science": "gpt-4o"},
+             "tiers": ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo-preview"]}
+        """
+        if not isinstance(config, dict):
+            raise ValueError("Invalid router config: expected an object")
+        return cls(**config)
+
+    @classmethod
+    def from_file(cls, path: str) -> "ModelRouter":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def route(self, method: str, goal_type: str = "") -> Route:
+        """The configured route for a call, before any adjustment."""
+        family = method.partition(".")[0]
+        for name in (f"{method}:{goal_type}", method, family):
+            route = self.routes.get(name)
+            if route is not None:
+                return route
+        return self.routes["default"]
+
+    def record(self, record: CallRecord) -> None:
+        if record.cache_hit:
+            return
+        # A parse failure is raised out of the span, so it always carries an error
+        if record.error is not None and record.error not in _TIMEOUT_ERRORS and not record.parse_failure:
+            return
+        with self._lock:
+            self._samples[(record.model, record.method)].append(
+                (time.monotonic(), record.latency, record.parse_failure)
+            )
+
+    def _stats(self, model: str, method: str, now: float) -> ModelStats:
+        samples = [s for s in self._samples.get((model, method), ()) if now - s[0] <= self.window_seconds]
+        if not samples:
+            return ModelStats(0, None, None, None)
+        latencies = sorted(latency for _, latency, _ in samples)
+        return ModelStats(
+            len(samples),
+            latencies[min(int(0.5 * len(latencies)), len(latencies) - 1)],
+            latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)],
+            sum(failed for _, _, failed in samples) / len(samples),
+        )
+
+    def _tier(self, model: str) -> Optional[int]:
+        return self.tiers.index(model) if model in self.tiers else None
+
+    def _reliable(self, stats: ModelStats, route: Route) -> bool:
+        return stats.samples < self.min_samples or stats.parse_failure_rate <= route.max_parse_failure_rate
+
+    def _fast(self, stats: ModelStats, route: Route) -> bool:
+        return route.slo is None or stats.samples < self.min_samples or stats.latency_p95 <= route.slo
+
+    def _pick(self, method: str, route: Route, now: float) -> Tuple[str, str]:
+        model, reason = route.model, "configured"
+        tier = self._tier(model)
+        stats = self._stats(model, method, now)
+        if tier is not None and not self._reliable(stats, route):
+            for candidate in self.tiers[tier + 1:]:
+                if self._reliable(self._stats(candidate, method, now), route):
+                    model = candidate
+                    reason = f"escalated from {route.model}: {stats.parse_failure_rate:.0%} parse failures"
+                    break
+
+        tier = self._tier(model)
+        stats = self._stats(model, method, now)
+        if tier is not None and not self._fast(stats, route):
+            for candidate in reversed(self.tiers[:tier]):
+                candidate_stats = self._stats(candidate, method, now)
+                if self._reliable(candidate_stats, route) and self._fast(candidate_stats, route):
+                    reason = f"fell back from {model}: p95 {stats.latency_p95:.2f}s over the {route.slo:g}s SLO"
+                    model = candidate
+                    break
+        return model, reason
+
+    def choose(self, method: str, goal_type: str = "") -> RouteDecision:
+        """Pick the model for one call and remember the decision."""
+        route = self.route(method, goal_type)
+        with self._lock:
+            model, reason = self._pick(method, route, time.monotonic())
+            decision = RouteDecision(method, goal_type, model, route.model, reason, time.time())
+            self._decisions.append(decision)
+        if model != route.model:
+            logger.info("routing %s (%s) to %s: %s", method, goal_type, model, reason)
+        return decision
+
+    def decisions(self, method: Optional[str] = None) -> List[RouteDecision]:
+        """Recent routing decisions, oldest first, optionally for one method only."""
+        with self._lock:
+            return [d for d in self._decisions if method is None or d.method == method]
+
+    def stats(self) -> List[Dict]:
+        """Recent latency and parse-failure figures per model and method."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {"model": model, "method": method, **self._stats(model, method, now)._asdict()}
+                for model, method in sorted(self._samples)
+            ]
+
+
+def default_router() -> ModelRouter:
+    """The router configured by PATHFORGE_ROUTES (a JSON file), or the built-in routes."""
+    if DEFAULT_ROUTES_PATH:
+        return ModelRouter.from_file(DEFAULT_ROUTES_PATH)
+    return ModelRouter()
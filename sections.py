@@ -0,0 +1,155 @@
+# sections.py
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import prompts
+from cache import normalize_responses
+from prompts import PromptTemplate
+
+SECTION_PROMPT = PromptTemplate("""
+    Learning goal: $goal_type
+    User profile: $profile
+    $task
+    $schema
+""")
+
+RESOURCE_CATEGORIES = ("courses", "tutorials", "documentation")
+
+# Roadmap fields that can be generated independently, in roadmap order
+SECTION_NAMES = ("research_insights", "resources", "milestones")
+
+# Words in an answer's field id or question category, and the sections that answer shapes
+SECTION_DEPENDENCIES = (
+    (("experience", "level", "background", "skill", "knowledge", "familiar"),
+     ("research_insights", "resources", "milestones")),
+    (("goal", "objective", "outcome", "interest", "focus", "project", "career", "motivation"),
+     ("research_insights", "milestones")),
+    (("time", "hour", "week", "day", "schedule", "availability", "deadline", "duration", "pace", "constraint"),
+     ("research_insights", "milestones")),
+    (("style", "prefer", "format", "resource", "budget", "cost", "free", "paid", "platform", "language", "medium"),
+     ("resources",)),
+)
+
+
+def _messages(goal_type: str, user_responses: Dict, task: str, schema: str, model: str) -> List[Dict]:
+    return prompts.messages(prompts.ROADMAP_SYSTEM, SECTION_PROMPT.render(
+        goal_type=goal_type,
+        profile=prompts.compact_json(prompts.prune_responses(user_responses)),
+        task=task,
+        schema=prompts.schema_instruction(prompts.SECTION_SCHEMAS[schema], model)
+    ))
+
+
+def response_format(schema: str, model: str) -> Dict:
+    return prompts.response_format(f"roadmap_{schema}", prompts.SECTION_SCHEMAS[schema], model)
+
+
+def insights_messages(goal_type: str, user_responses: Dict, model: str) -> List[Dict]:
+    return _messages(
+        goal_type, user_responses,
+        "Give research insights: key concepts, prerequisites, the recommended learning approach "
+        "and an estimated overall duration.",
+        "insights", model
+    )
+
+
+def resources_messages(goal_type: str, user_responses: Dict, model: str) -> List[Dict]:
+    return _messages(
+        goal_type, user_responses,
+        "Curate learning resources (courses, tutorials, documentation) matched to the profile.",
+        "resources", model
+    )
+
+
+def outline_messages(goal_type: str, user_responses: Dict, model: str) -> List[Dict]:
+    return _messages(
+        goal_type, user_responses,
+        "Outline the roadmap as 3-5 sequential phases, each with its focus and ordered milestone "
+        "titles. Do not describe the milestones yet.",
+        "outline", model
+    )
+
+
+def phase_messages(goal_type: str, user_responses: Dict, outline: Dict, phase_index: int,
+                   model: str) -> List[Dict]:
+    phases = outline.get("phases") or []
+    phase = phases[phase_index]
+    overview = "; ".join(
+        f"{i + 1}. {p.get('title', '')}: {', '.join(p.get('milestone_titles') or [])}"
+        for i, p in enumerate(phases)
+    )
+    return _messages(
+        goal_type, user_responses,
+        f"Roadmap phases: {overview}\n"
+        f"Write only the milestones of phase {phase_index + 1} ({phase.get('title', '')}, "
+        f"focus: {phase.get('focus', '')}), one per milestone title, in order, "
+        "progressing from the previous phase.",
+        "milestones", model
+    )
+
+
+def merge_phases(phase_milestones: List[Dict]) -> List[Dict]:
+    """Concatenate per-phase milestone responses in phase order."""
+    milestones = []
+    for part in phase_milestones:
+        milestones.extend(part.get("milestones") or [])
+    return milestones
+
+
+def splice_sections(roadmap: Mapping, regenerated: Mapping) -> Dict:
+    """Replace the regenerated sections of a roadmap and keep the others."""
+    return {name: regenerated[name] if name in regenerated else roadmap.get(name) for name in SECTION_NAMES}
+
+
+def changed_fields(previous: Dict, current: Dict) -> List[str]:
+    """Answer fields whose normalized values differ, including added and removed ones."""
+    return sorted(
+        field for field in set(previous) | set(current)
+        if normalize_responses(previous.get(field)) != normalize_responses(current.get(field))
+    )
+
+
+def affected_sections(fields: Iterable[str], categories: Optional[Mapping[str, str]] = None) -> Tuple[str, ...]:
+    """Sections that depend on any of the given answer fields.
+
+    A field is matched on its id and, when known, its question category. A
+    field that matches nothing could shape anything, so it affects every
+    section.
+    """
+    affected = set()
+    for field in fields:
+        text = f"{field} {(categories or {}).get(field) or ''}".lower()
+        matched = [names for words, names in SECTION_DEPENDENCIES if any(word in text for word in words)]
+        if not matched:
+            return SECTION_NAMES
+        for names in matched:
+            affected.update(names)
+    return tuple(name for name in SECTION_NAMES if name in affected)
+
+
+def validate_roadmap(roadmap: Dict) -> None:
+    """Raise ValueError if the roadmap does not have the shape app.py renders."""
+    problems = []
+    if not isinstance(roadmap.get("research_insights"), dict):
+        problems.append("research_insights must be an object")
+
+    resources = roadmap.get("resources")
+    if not isinstance(resources, dict):
+        problems.append("resources must be an object")
+    else:
+        for category in RESOURCE_CATEGORIES:
+            items = resources.get(category, [])
+            if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+                problems.append(f"resources.{category} must be a list of objects")
+
+    milestones = roadmap.get("milestones")
+    if not isinstance(milestones, list) or not milestones:
+        problems.append("milestones must be a non-empty list")
+    else:
+        for index, milestone in enumerate(milestones):
+            if not isinstance(milestone, dict) or not milestone.get("title"):
+                problems.append(f"milestones[{index}] must be an object with a title")
+            elif not isinstance(milestone.get("checkpoints", []), list):
+                problems.append(f"milestones[{index}].checkpoints must be a list")
+
+    if problems:
+        raise ValueError("Invalid roadmap: " + "; ".join(problems))
@@ -0,0 +1,353 @@
+# semantic_cache.py
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+import zlib
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cache import normalize_responses
+from prompts import prune_responses
+
+# Bump when the featurizer or the saved layout changes so saved caches are ignored.
+SEMANTIC_FORMAT_VERSION = 2
+
+DEFAULT_DIM = 4096
+DEFAULT_THRESHOLD = 0.85
+NGRAM_SIZES = (3, 4, 5)
+
+_WORD = re.compile(r"\w+")
+
+
+def _features(field: str, value: Any) -> List[str]:
+    """Hashable features for one answer: its words and their character n-grams."""
+    if isinstance(value, bool) or isinstance(value, (int, float)):
+        # Numbers only match exactly; n-grams would make 10 and 100 look alike
+        return [f"{field}\x1f#{value}"]
+    if isinstance(value, list):
+        return [feature for item in value for feature in _features(field, item)]
+    if isinstance(value, dict):
+        return [feature for key, item in value.items() for feature in _features(f"{field}.{key}", item)]
+    features = []
+    for word in _WORD.findall(str(value).lower()):
+        features.append(f"{field}\x1f{word}")
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            features.extend(f"{field}\x1f{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    return features
+
+
+def _hashed(features: List[str], dim: int) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32)
+    if hashes.size:
+        # The top bit picks the sign so collisions cancel out instead of piling up
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, (hashes & 0x7FFFFFFF) % dim, signs)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _is_text(field: str, value: Any, text_fields: Optional[Collection[str]]) -> bool:
+    if text_fields is None:
+        return isinstance(value, str)
+    return field in text_fields
+
+
+def exact_answers(user_responses: Dict, text_fields: Optional[Collection[str]] = None) -> str:
+    """Canonical form of the answers that must match exactly: everything but free text.
+
+    text_fields are the ids of free-text questions; without them, string
+    answers count as free text and numbers, booleans and lists must match.
+    """
+    responses = normalize_responses(prune_responses(user_responses))
+    return json.dumps(
+        {field: value for field, value in responses.items() if not _is_text(field, value, text_fields)},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+
+def featurize(user_responses: Dict, dim: int = DEFAULT_DIM,
+              text_fields: Optional[Collection[str]] = None) -> np.ndarray:
+    """Embed free-text answers as L2-normalized signed hashed bags of words and n-grams.
+
+    Only the answers exact_answers() leaves out are embedded. Each one is
+    embedded on its own and weighted equally, so a long answer can't drown
+    out the short ones, and features are namespaced by question id, so the
+    same words under different questions don't match. Purely local and
+    deterministic across processes.
+    """
+    responses = normalize_responses(prune_responses(user_responses))
+    vector = np.zeros(dim, dtype=np.float32)
+    for field, value in responses.items():
+        if _is_text(field, value, text_fields):
+            vector += _hashed(_features(field, value), dim)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _Partition:
+    """Vectors and values for one goal type and set of exact answers; rows beyond size are unused."""
+    __slots__ = ("matrix", "keys", "values", "rows", "last_used", "size")
+
+    def __init__(self, dim: int, matrix: Optional[np.ndarray] = None, keys: Optional[List[str]] = None,
+                 values: Optional[List[Any]] = None):
+        self.matrix = np.zeros((0, dim), dtype=np.float32) if matrix is None else matrix
+        self.keys = keys or []
+        self.values = values or []
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.size = len(self.keys)
+        self.last_used = np.zeros(self.size, dtype=np.int64)
+
+    def grow(self, capacity: int) -> None:
+        # Also turns a copy-on-write memory map into an ordinary array
+        matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        last_used = np.zeros(capacity, dtype=np.int64)
+        last_used[:self.size] = self.last_used[:self.size]
+        self.matrix, self.last_used = matrix, last_used
+
+    def remove(self, row: int) -> None:
+        """Drop a row by moving the last one into its place."""
+        last = self.size - 1
+        del self.rows[self.keys[row]]
+        if row != last:
+            if not self.matrix.flags.writeable:
+                self.grow(len(self.matrix))
+            self.matrix[row] = self.matrix[last]
+            self.last_used[row] = self.last_used[last]
+            self.keys[row], self.values[row] = self.keys[last], self.values[last]
+            self.rows[self.keys[row]] = row
+        self.keys.pop()
+        self.values.pop()
+        self.size = last
+
+
+class SemanticCache:
+    """Nearest-neighbour roadmap cache over embedded answers.
+
+    Profiles that differ only trivially from a stored one ("get a job as a
+    data analyst" vs "get a job as data analyst") are served its value when
+    their cosine similarity reaches threshold. Only free-text answers are compared by
+    similarity; select, number and multiselect answers must match exactly
+    (see exact_answers), so "beginner" is never served an "intermediate"
+    roadmap. text_fields names the free-text questions.
+
+    Vectors live in one NumPy matrix per goal type and set of exact answers,
+    so a lookup is a single matrix product; lookup_many and insert_many
+    amortize that over a batch. Each goal type keeps at most max_entries,
+    evicting the least recently used.
+
+    save() writes one .npy matrix per partition plus a JSON index, and load()
+    memory-maps the matrices, so a large cache opens without reading them.
+    namespace (e.g. prompt version and model) must match for load() to use a
+    saved cache.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = 4096, dim: int = DEFAULT_DIM,
+                 namespace: str = ""):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dim = dim
+        self.namespace = namespace
+        # (goal_type, exact answers) -> partition
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._lock = threading.Lock()
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def lookup(self, goal_type: str, user_responses: Dict,
+               text_fields: Optional[Collection[str]] = None) -> Optional[Tuple[Any, float]]:
+        """The nearest stored value and its similarity, or None below threshold."""
+        return self.lookup_many([(goal_type, user_responses)], text_fields)[0]
+
+    def lookup_many(self, queries: Sequence[Tuple[str, Dict]],
+                    text_fields: Optional[Collection[str]] = None) -> List[Optional[Tuple[Any, float]]]:
+        results: List[Optional[Tuple[Any, float]]] = [None] * len(queries)
+        by_partition: Dict[Tuple[str, str], List[int]] = {}
+        for i, (goal_type, responses) in enumerate(queries):
+            by_partition.setdefault((goal_type, exact_answers(responses, text_fields)), []).append(i)
+        vectors = [featurize(responses, self.dim, text_fields) for _, responses in queries]
+
+        with self._lock:
+            for partition_key, indices in by_partition.items():
+                partition = self._partitions.get(partition_key)
+                if partition is None or not partition.size:
+                    continue
+                matrix = partition.matrix[:partition.size]
+                similarities = np.stack([vectors[i] for i in indices]) @ matrix.T
+                # Profiles without free text are equal when their exact answers are
+                blank = ~matrix.any(axis=1)
+                for position, i in enumerate(indices):
+                    if not vectors[i].any():
+                        similarities[position] = blank
+                best = similarities.argmax(axis=1)
+                scores = similarities[np.arange(len(indices)), best]
+                for i, row, score in zip(indices, best, scores):
+                    if score >= self.threshold:
+                        partition.last_used[row] = self._tick()
+                        results[i] = (partition.values[row], float(score))
+            found = sum(result is not None for result in results)
+            self.hits += found
+            self.misses += len(queries) - found
+        return results
+
+    def insert(self, goal_type: str, user_responses: Dict, key: str, value: Any,
+               text_fields: Optional[Collection[str]] = None) -> None:
+        """Store a value; key identifies the exact profile, so re-inserting replaces it."""
+        self.insert_many([(goal_type, user_responses, key, value)], text_fields)
+
+    def _goal_partitions(self, goal_type: str) -> List[Tuple[Tuple[str, str], _Partition]]:
+        return [(partition_key, p) for partition_key, p in self._partitions.items() if partition_key[0] == goal_type]
+
+    def _evict(self, goal_type: str) -> None:
+        """Drop the goal type's least recently used entry, whichever partition holds it."""
+        partition_key, partition = min(
+            ((partition_key, p) for partition_key, p in self._goal_partitions(goal_type) if p.size),
+            key=lambda item: item[1].last_used[:item[1].size].min()
+        )
+        partition.remove(int(partition.last_used[:partition.size].argmin()))
+        if not partition.size:
+            del self._partitions[partition_key]
+        self.evictions += 1
+
+    def insert_many(self, items: Sequence[Tuple[str, Dict, str, Any]],
+                    text_fields: Optional[Collection[str]] = None) -> None:
+        vectors = [featurize(responses, self.dim, text_fields) for _, responses, _, _ in items]
+        with self._lock:
+            for (goal_type, responses, key, value), vector in zip(items, vectors):
+                partition_key = (goal_type, exact_answers(responses, text_fields))
+                partition = self._partitions.get(partition_key)
+                row = None if partition is None else partition.rows.get(key)
+                if row is None:
+                    if sum(p.size for _, p in self._goal_partitions(goal_type)) >= self.max_entries:
+                        self._evict(goal_type)
+                        partition = self._partitions.get(partition_key)
+                    if partition is None:
+                        partition = self._partitions[partition_key] = _Partition(self.dim)
+                    if partition.size == len(partition.matrix) or not partition.matrix.flags.writeable:
+                        partition.grow(min(max(2 * partition.size, 16), self.max_entries))
+                    row = partition.size
+                    partition.size += 1
+                    partition.keys.append(key)
+                    partition.values.append(value)
+                    partition.rows[key] = row
+                else:
+                    partition.values[row] = value
+                if not partition.matrix.flags.writeable:
+                    partition.grow(len(partition.matrix))
+                partition.matrix[row] = vector
+                partition.last_used[row] = self._tick()
+
+    def invalidate(self, goal_type: Optional[str] = None) -> None:
+        with self._lock:
+            if goal_type is None:
+                self._partitions.clear()
+            else:
+                for partition_key, _ in self._goal_partitions(goal_type):
+                    del self._partitions[partition_key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(partition.size for partition in self._partitions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(partition.size for partition in self._partitions.values()),
+                "goal_types": len({goal_type for goal_type, _ in self._partitions}),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _write_atomically(directory: str, name: str, write) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, os.path.join(directory, name))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def save(self, directory: str) -> None:
+        """Write the cache to directory, replacing what a previous save put there.
+
+        Matrices get names unique to this save, so the index a concurrent
+        reader sees never names a half-written or rewritten matrix, and a
+        loaded cache can be saved back over the files it maps.
+        """
+        os.makedirs(directory, exist_ok=True)
+        index = {"format": SEMANTIC_FORMAT_VERSION, "namespace": self.namespace, "dim": self.dim, "partitions": []}
+        generation = uuid.uuid4().hex[:12]
+        with self._lock:
+            for number, ((goal_type, answers), partition) in enumerate(self._partitions.items()):
+                name = f"partition-{generation}-{number}.npy"
+                # A real copy: the matrix may be a memory map of an earlier save's file
+                matrix = np.array(partition.matrix[:partition.size])
+                self._write_atomically(directory, name, lambda f, matrix=matrix: np.save(f, matrix))
+                index["partitions"].append({
+                    "goal_type": goal_type, "answers": answers,
+                    "matrix": name, "keys": partition.keys, "values": partition.values,
+                })
+        # The index goes last; it names the matrices that belong to it
+        self._write_atomically(directory, "index.json", lambda f: f.write(json.dumps(index).encode("utf-8")))
+        # Matrices of earlier saves are garbage now; open memory maps keep theirs alive on POSIX
+        for name in os.listdir(directory):
+            if name.startswith("partition-") and name.endswith(".npy") and generation not in name:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> "SemanticCache":
+        """Open a saved cache with memory-mapped matrices; empty if missing or incompatible.
+
+        kwargs are passed to the constructor; a dim or namespace that differs
+        from the saved one discards it.
+        """
+        cache = cls(**kwargs)
+        try:
+            with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if (index.get("format"), index.get("namespace"), index.get("dim")) != \
+                (SEMANTIC_FORMAT_VERSION, cache.namespace, cache.dim):
+            return cache
+        loaded: Dict[str, int] = {}
+        for saved in index["partitions"]:
+            try:
+                partition_key = (saved["goal_type"], saved["answers"])
+                # Copy-on-write: rows are paged in as lookups touch them and the file is never modified
+                matrix = np.load(os.path.join(directory, saved["matrix"]), mmap_mode="c")
+                keys, values = saved["keys"], saved["values"]
+            except (OSError, ValueError, KeyError, TypeError):
+                # A missing or truncated matrix only loses its own partition
+                continue
+            if matrix.shape != (len(keys), cache.dim):
+                continue
+            keep = min(len(keys), cache.max_entries - loaded.get(partition_key[0], 0))
+            if keep <= 0:
+                continue
+            loaded[partition_key[0]] = loaded.get(partition_key[0], 0) + keep
+            partition = _Partition(cache.dim, matrix[:keep], keys[:keep], values[:keep])
+            # Read-only until the first insert copies it into a growable array
+            partition.matrix.flags.writeable = False
+            cache._partitions[partition_key] = partition
+        return cache
@@ -0,0 +1,63 @@
+# singleflight.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent identical async calls into one upstream call.
+
+    Callers passing the same key while a call is in flight wait on that call
+    and share its result (or exception). A waiter being cancelled doesn't
+    cancel the shared call unless it was the last one waiting. Safe to use from
+    several threads and event loops; calls only coalesce within a loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[int, str], list] = {}
+        self.calls = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self.calls += 1
+            entry = self._inflight.get(flight_key)
+            if entry is None:
+                self.upstream_calls += 1
+                task = loop.create_task(fn())
+                entry = self._inflight[flight_key] = [task, 0]
+                task.add_done_callback(lambda _: self._forget(flight_key, task))
+            else:
+                self.coalesced += 1
+            entry[1] += 1
+        task = entry[0]
+
+        try:
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                abandoned = entry[1] == 0 and not task.done()
+            if abandoned:
+                # Every waiter was cancelled, so nobody needs the result
+                task.cancel()
+
+    def _forget(self, flight_key: Tuple[int, str], task: asyncio.Task) -> None:
+        with self._lock:
+            entry = self._inflight.get(flight_key)
+            if entry is not None and entry[0] is task:
+                del self._inflight[flight_key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "upstream_calls": self.upstream_calls,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+                "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0,
+            }
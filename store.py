@@ -0,0 +1,228 @@
+# store.py
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cache import DEFAULT_CACHE_DIR
+from instrumentation import logger
+
+# Bump when the table layout changes; older databases are migrated on open.
+SCHEMA_VERSION = 1
+
+DEFAULT_STORE_PATH = os.environ.get("PATHFORGE_STORE_PATH", os.path.join(DEFAULT_CACHE_DIR, "pathforge.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT PRIMARY KEY,
+    step TEXT NOT NULL,
+    goal_type TEXT,
+    responses TEXT NOT NULL DEFAULT '{}',
+    questions TEXT,
+    profile_hash TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_profile_hash ON sessions (profile_hash);
+
+CREATE TABLE IF NOT EXISTS roadmaps (
+    profile_hash TEXT PRIMARY KEY,
+    goal_type TEXT NOT NULL,
+    roadmap TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    user_id TEXT NOT NULL,
+    profile_hash TEXT NOT NULL,
+    milestone INTEGER NOT NULL,
+    checkpoint TEXT NOT NULL,
+    done INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, profile_hash, milestone, checkpoint)
+) WITHOUT ROWID;
+"""
+
+
+class RoadmapStore:
+    """Per-user sessions, generated roadmaps and checkpoint progress in SQLite.
+
+    All threads share one connection, serialized by a lock. Streamlit runs
+    every rerun on a new thread, so per-thread connections would pile up
+    for the life of the process. The database runs in WAL mode, so other
+    processes can read while this one writes. Roadmaps are keyed by profile hash and
+    shared by every user with the same answers. Sessions and progress are
+    keyed by user.
+
+    Checkpoint toggles are buffered. They are written in one transaction
+    once flush_size are pending or every flush_interval seconds, and reads
+    see buffered values immediately.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, flush_interval: float = 1.0, flush_size: int = 64):
+        self.path = path
+        self.flush_size = flush_size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps commits durable across crashes at NORMAL; only power loss can drop the last ones
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # Serializes flushes so an older batch can't commit over a newer one
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str, int, str], Tuple[bool, float]] = {}
+        self._migrate()
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,),
+                                         name="store-flush", daemon=True)
+        self._flusher.start()
+        # Don't lose the last second of toggles when the process exits
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """The shared connection, held for one transaction; commits on success."""
+        with self._db_lock:
+            with self._conn:
+                yield self._conn
+
+    def _migrate(self) -> None:
+        with self._connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # Sessions
+
+    def save_session(self, user_id: str, step: str, goal_type: Optional[str] = None,
+                     responses: Optional[Dict] = None, questions: Optional[Dict] = None,
+                     profile_hash: Optional[str] = None) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO sessions (user_id, step, goal_type, responses, questions, profile_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET step = excluded.step, goal_type = excluded.goal_type, "
+                "responses = excluded.responses, questions = excluded.questions, "
+                "profile_hash = excluded.profile_hash, updated_at = excluded.updated_at",
+                (user_id, step, goal_type, json.dumps(responses or {}),
+                 None if questions is None else json.dumps(questions), profile_hash, time.time())
+            )
+
+    def load_session(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT step, goal_type, responses, questions, profile_hash FROM sessions WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        step, goal_type, responses, questions, profile_hash = row
+        return {
+            "step": step,
+            "goal_type": goal_type,
+            "responses": json.loads(responses),
+            "questions": None if questions is None else json.loads(questions),
+            "profile_hash": profile_hash,
+        }
+
+    def delete_session(self, user_id: str) -> None:
+        """Forget a user's session and progress; shared roadmaps are kept."""
+        with self._flush_lock:
+            with self._lock:
+                self._pending = {k: v for k, v in self._pending.items() if k[0] != user_id}
+            self._delete(user_id)
+
+    def _delete(self, user_id: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def users_for_profile(self, profile_hash: str) -> List[str]:
+        with self._connection() as conn:
+            rows = conn.execute("SELECT user_id FROM sessions WHERE profile_hash = ?", (profile_hash,)).fetchall()
+        return [user_id for (user_id,) in rows]
+
+    # Roadmaps
+
+    def save_roadmap(self, profile_hash: str, goal_type: str, roadmap: Dict) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO roadmaps (profile_hash, goal_type, roadmap, created_at) VALUES (?, ?, ?, ?)",
+                (profile_hash, goal_type, json.dumps(roadmap, ensure_ascii=False), time.time())
+            )
+
+    def roadmap(self, profile_hash: str) -> Optional[Dict]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT roadmap FROM roadmaps WHERE profile_hash = ?", (profile_hash,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    # Checkpoint progress
+
+    def set_checkpoint(self, user_id: str, profile_hash: str, milestone: int, checkpoint: str,
+                       done: bool) -> None:
+        """Buffer a checkpoint toggle; the latest value per checkpoint wins."""
+        with self._lock:
+            self._pending[(user_id, profile_hash, milestone, checkpoint)] = (bool(done), time.time())
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self.flush()
+
+    def checkpoints(self, user_id: str, profile_hash: str) -> Dict[Tuple[int, str], bool]:
+        """Checkpoint state for one user's roadmap, keyed by (milestone, checkpoint)."""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT milestone, checkpoint, done FROM checkpoints WHERE user_id = ? AND profile_hash = ?",
+                (user_id, profile_hash)
+            ).fetchall()
+        progress = {(milestone, checkpoint): bool(done) for milestone, checkpoint, done in rows}
+        with self._lock:
+            for (pending_user, pending_hash, milestone, checkpoint), (done, _) in self._pending.items():
+                if pending_user == user_id and pending_hash == profile_hash:
+                    progress[(milestone, checkpoint)] = done
+        return progress
+
+    def flush(self) -> int:
+        """Write buffered checkpoint toggles in one transaction; return how many."""
+        with self._flush_lock:
+            with self._lock:
+                pending = dict(self._pending)
+            if not pending:
+                return 0
+            # Entries stay buffered until committed, so checkpoints() never misses
+            # them; on failure they are simply retried on the next flush
+            with self._connection() as conn:
+                conn.executemany(
+                    "INSERT INTO checkpoints (user_id, profile_hash, milestone, checkpoint, done, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, profile_hash, milestone, checkpoint) "
+                    "DO UPDATE SET done = excluded.done, updated_at = excluded.updated_at",
+                    [key + (int(done), updated_at) for key, (done, updated_at) in pending.items()]
+                )
+            with self._lock:
+                for key, value in pending.items():
+                    # Keep a newer toggle that arrived during the write
+                    if self._pending.get(key) == value:
+                        del self._pending[key]
+            return len(pending)
+
+    def _flush_loop(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("flushing checkpoint progress failed")
+
+    def close(self) -> None:
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
@@ -0,0 +1,163 @@
+# streaming.py
+import json
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+WILDCARD = "*"
+
+# Paths whose values are surfaced as soon as they finish streaming.
+ROADMAP_STREAM_PATHS = [
+    ("research_insights",),
+    ("resources", WILDCARD, WILDCARD),
+    ("milestones", WILDCARD),
+]
+
+# Models put raw newlines and tabs inside strings; jsonrepair accepts them too
+_decoder = json.JSONDecoder(strict=False)
+
+
+class RoadmapSection(NamedTuple):
+    """A piece of a roadmap that has finished streaming.
+
+    kind is "research_insights", "resource", "milestone", or "roadmap" for the
+    complete document emitted last.
+    """
+    kind: str
+    data: Any
+    category: Optional[str] = None
+    index: Optional[int] = None
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "start", "key", "index", "expect_key", "awaiting_value")
+
+    def __init__(self, kind: str, path: Tuple, start: int):
+        self.kind = kind
+        self.path = path
+        self.start = start
+        self.key = None
+        self.index = -1
+        self.expect_key = kind == "{"
+        self.awaiting_value = kind == "["
+
+
+class IncrementalJSONParser:
+    """Incrementally scan a JSON document and emit containers at watched paths.
+
+    Text is fed in arbitrary chunks; each call to feed() returns the (path,
+    value) pairs for objects and arrays that closed within that chunk. Leading
+    prose or code fences before the root object and trailing text after it are
+    ignored, and a watched value that fails to decode is skipped rather than
+    raised so a single bad element does not abort the stream.
+    """
+
+    def __init__(self, watch: Sequence[Tuple] = ROADMAP_STREAM_PATHS):
+        self.watch = [tuple(p) for p in watch]
+        self.text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._started = False
+        self.done = False
+
+    def _watched(self, path: Tuple) -> bool:
+        for pattern in self.watch:
+            if len(pattern) == len(path) and all(
+                p == WILDCARD or p == q for p, q in zip(pattern, path)
+            ):
+                return True
+        return False
+
+    def _value_path(self) -> Tuple:
+        frame = self._stack[-1]
+        if frame.kind == "{":
+            return frame.path + (frame.key,)
+        if frame.awaiting_value:
+            frame.index += 1
+            frame.awaiting_value = False
+        return frame.path + (frame.index,)
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple, Any]]:
+        """Append a chunk and return values at watched paths completed by it."""
+        if not chunk or self.done:
+            self.text += chunk or ""
+            return []
+        self.text += chunk
+        emitted = []
+        text = self.text
+        i = self._pos
+
+        while i < len(text):
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    frame = self._stack[-1]
+                    if frame.kind == "{" and frame.expect_key:
+                        try:
+                            frame.key = _decoder.decode(text[self._string_start:i + 1])
+                        except ValueError:
+                            frame.key = text[self._string_start + 1:i]
+                        frame.expect_key = False
+                i += 1
+                continue
+
+            if not self._started:
+                # Skip anything before the root object
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(_Frame("{", (), i))
+                i += 1
+                continue
+
+            if ch in "{[":
+                path = self._value_path()
+                self._stack.append(_Frame(ch, path, i))
+            elif ch in "}]":
+                frame = self._stack.pop()
+                if self._watched(frame.path):
+                    try:
+                        emitted.append((frame.path, _decoder.decode(text[frame.start:i + 1])))
+                    except ValueError:
+                        pass
+                if not self._stack:
+                    self.done = True
+                    i += 1
+                    break
+            elif ch == '"':
+                frame = self._stack[-1]
+                if not (frame.kind == "{" and frame.expect_key):
+                    self._value_path()
+                self._in_string = True
+                self._string_start = i
+            elif ch == ",":
+                frame = self._stack[-1]
+                if frame.kind == "{":
+                    frame.expect_key = True
+                else:
+                    frame.awaiting_value = True
+            elif ch not in " \t\r\n:":
+                # Start or continuation of a number/true/false/null
+                frame = self._stack[-1]
+                if frame.kind == "[" and frame.awaiting_value:
+                    self._value_path()
+            i += 1
+
+        self._pos = i
+        return emitted
+
+
+def section_from_path(path: Tuple, value: Any) -> RoadmapSection:
+    """Turn a watched roadmap path into a typed section."""
+    if path[0] == "research_insights":
+        return RoadmapSection("research_insights", value)
+    if path[0] == "resources":
+        return RoadmapSection("resource", value, category=path[1], index=path[2])
+    return RoadmapSection("milestone", value, index=path[1])
+
@@ -0,0 +1,46 @@
+# tests/test_cache.py
+import time
+
+from cache import DiskCache, LRUCache, TieredCache, profile_key
+
+
+def _tiered(tmp_path, ttl=None):
+    return TieredCache(LRUCache(maxsize=8), DiskCache(str(tmp_path), "test", ttl=ttl))
+
+
+def test_memory_and_disk_hits(tmp_path):
+    cache = _tiered(tmp_path)
+    cache.set("key", {"a": 1})
+    assert cache.get("key") == {"a": 1}
+
+    # A new process only has the disk tier
+    cold = _tiered(tmp_path)
+    assert cold.get("key") == {"a": 1}
+    assert cold.get("key") == {"a": 1}
+    assert cold.get("missing") is None
+    stats = cold.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_not_served_from_memory(tmp_path):
+    cache = _tiered(tmp_path, ttl=0.05)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert "key" not in cache
+    assert cache.get_stale("key") == "value"
+
+
+def test_falsy_values_are_served_stale(tmp_path):
+    cache = _tiered(tmp_path, ttl=0.05)
+    cache.set("key", {})
+    time.sleep(0.1)
+    assert cache.get_stale("key") == {}
+
+
+def test_profile_key_ignores_answer_order_and_whitespace():
+    first = profile_key("python", {"topics": ["b", "a"], "goal": " web "}, "v1", "model")
+    second = profile_key("python", {"goal": "web", "topics": ["a", "b"]}, "v1", "model")
+    assert first == second
+    assert first != profile_key("python", {"goal": "web", "topics": ["a", "b"]}, "v2", "model")
@@ -0,0 +1,31 @@
+# tests/test_jsonrepair.py
+import pytest
+
+from jsonrepair import RepairResult, repair_json
+
+
+def test_valid_json_is_not_repaired():
+    assert repair_json('{"a": 1}') == RepairResult({"a": 1}, False, False)
+
+
+def test_prose_fences_and_trailing_commas_are_dropped():
+    text = 'Here you go:\n```json\n{"a": [1, 2,]}\n```'
+    assert repair_json(text) == RepairResult({"a": [1, 2]}, True, False)
+
+
+def test_raw_newlines_inside_strings_are_accepted():
+    assert repair_json('{"a": "line1\nline2"}').value == {"a": "line1\nline2"}
+
+
+def test_truncated_document_is_closed_and_flagged():
+    assert repair_json('{"a": [1, 2') == RepairResult({"a": [1, 2]}, True, True)
+    assert repair_json('{"a": "unterminated') == RepairResult({"a": "unterminated"}, True, True)
+
+
+def test_dangling_literal_is_cut_at_the_last_complete_element():
+    assert repair_json('{"a": 1, "b": tr') == RepairResult({"a": 1}, True, True)
+
+
+def test_unrecoverable_output_raises():
+    with pytest.raises(ValueError):
+        repair_json("no json here")
@@ -0,0 +1,152 @@
+# tests/test_resilience.py
+import asyncio
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, Resilience, RetryPolicy
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def _resilience(reset_timeout: float = 0.0) -> Resilience:
+    return Resilience(
+        retry=RetryPolicy(max_attempts=1),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout),
+        hedge_percentile=None,
+    )
+
+
+def _fail(exc: BaseException):
+    async def fn():
+        raise exc
+    return fn
+
+
+async def _ok():
+    return "ok"
+
+
+def _open(resilience: Resilience) -> None:
+    for _ in range(resilience.breaker.failure_threshold):
+        with pytest.raises(StatusError):
+            asyncio.run(resilience.call(_fail(StatusError(503)), "key"))
+    assert resilience.breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_opens_after_consecutive_upstream_failures():
+    resilience = _resilience(reset_timeout=60.0)
+    _open(resilience)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(resilience.call(_ok, "key"))
+    assert resilience.short_circuits == 1
+
+
+def test_bad_requests_do_not_open_the_breaker():
+    resilience = _resilience(reset_timeout=60.0)
+    for _ in range(5):
+        with pytest.raises(StatusError):
+            asyncio.run(resilience.call(_fail(StatusError(400)), "key"))
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_and_failed_probe_reopens():
+    resilience = _resilience()
+    _open(resilience)
+    assert asyncio.run(resilience.call(_ok, "key")) == "ok"
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+    _open(resilience)
+    with pytest.raises(StatusError):
+        asyncio.run(resilience.call(_fail(StatusError(503)), "key"))
+    assert resilience.breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_probe_is_released():
+    resilience = _resilience()
+    _open(resilience)
+
+    async def cancel_probe():
+        probe = asyncio.ensure_future(resilience.call(lambda: asyncio.sleep(10), "key"))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    assert resilience.breaker.state == CircuitBreaker.HALF_OPEN
+    # The next call gets to probe instead of failing fast forever
+    assert asyncio.run(resilience.call(_ok, "key")) == "ok"
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_non_retryable_probe_error_settles_the_probe():
+    resilience = _resilience()
+    _open(resilience)
+    with pytest.raises(StatusError):
+        asyncio.run(resilience.call(_fail(StatusError(400)), "key"))
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+    assert asyncio.run(resilience.call(_ok, "key")) == "ok"
+
+
+def test_call_sync_releases_an_interrupted_probe():
+    resilience = _resilience()
+    _open(resilience)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        resilience.call_sync(interrupted, "key")
+    assert resilience.call_sync(lambda: "ok", "key") == "ok"
+
+
+def test_retryable_failures_are_retried():
+    resilience = Resilience(retry=RetryPolicy(max_attempts=3, base_delay=0.0), hedge_percentile=None)
+    outcomes = [StatusError(503), StatusError(503), "ok"]
+
+    async def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert asyncio.run(resilience.call(flaky, "key")) == "ok"
+    assert (resilience.attempts, resilience.retries) == (3, 2)
+
+
+def test_slow_attempt_is_hedged_and_the_loser_cancelled():
+    tracker = LatencyTracker(min_samples=1)
+    tracker.add("key", 0.01)
+    resilience = Resilience(tracker=tracker)
+    delays = [10.0, 0.0]
+    cancelled = []
+
+    async def attempt():
+        try:
+            await asyncio.sleep(delays.pop(0))
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "ok"
+
+    async def main():
+        result = await resilience.call(attempt, "key")
+        # Let the cancelled primary unwind
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "ok"
+    assert (resilience.hedges, resilience.hedge_wins) == (1, 1)
+    assert cancelled == [True]
@@ -0,0 +1,63 @@
+# tests/test_roadmap_generator.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from instrumentation import InMemoryAggregator, Instrumentation
+from jsonrepair import TruncatedOutputError
+from roadmap_generator import AsyncRoadmapGenerator
+
+CUT_OFF = '{"milestones": [{"title": "Basics"}, {"title": "Proj'
+TAIL = 'ects"}]}'
+
+
+def _response(content: str, finish_reason: str = "stop"):
+    return SimpleNamespace(usage=None, choices=[
+        SimpleNamespace(finish_reason=finish_reason, message=SimpleNamespace(content=content))
+    ])
+
+
+class FakeCompletions:
+    """Answers with a cut-off roadmap; continuations (no response_format) get `tail`."""
+
+    def __init__(self, tail):
+        self.tail = tail
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        if "response_format" in kwargs:
+            return _response(CUT_OFF, "length")
+        if isinstance(self.tail, BaseException):
+            raise self.tail
+        return _response(self.tail)
+
+
+def _generator(tmp_path, tail):
+    aggregator = InMemoryAggregator()
+    generator = AsyncRoadmapGenerator(
+        api_key="test", cache_dir=str(tmp_path), instrumentation=Instrumentation([aggregator])
+    )
+    completions = FakeCompletions(tail)
+    generator.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return generator, completions, aggregator
+
+
+def test_cut_off_response_is_completed_by_a_continuation(tmp_path):
+    generator, completions, aggregator = _generator(tmp_path, TAIL)
+    roadmap = asyncio.run(generator.generate_roadmap("python", {"level": "beginner"}))
+    assert [milestone.title for milestone in roadmap.milestones] == ["Basics", "Projects"]
+    assert len(completions.requests) == 2
+    (row,) = aggregator.summary()
+    assert (row["continuations"], row["truncations"]) == (1, 0)
+    assert generator.has_cached_roadmap("python", {"level": "beginner"})
+
+
+def test_failed_continuation_raises_and_caches_nothing(tmp_path):
+    generator, _, aggregator = _generator(tmp_path, ValueError("bad request"))
+    with pytest.raises(TruncatedOutputError):
+        asyncio.run(generator.generate_roadmap("python", {"level": "beginner"}))
+    (row,) = aggregator.summary()
+    assert (row["truncations"], row["errors"]) == (1, 1)
+    assert not generator.has_cached_roadmap("python", {"level": "beginner"})
@@ -0,0 +1,21 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_goal_page_renders_without_crewai_or_openai(tmp_path):
+    # A fresh interpreter, so nothing imported by the test run itself counts
+    env = dict(
+        os.environ,
+        PATHFORGE_CACHE_DIR=str(tmp_path),
+        PATHFORGE_STORE_PATH=str(tmp_path / "pathforge.db"),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", "from benchmarks.startup import check_goal_page; print(repr(check_goal_page()))"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "None"
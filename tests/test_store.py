@@ -0,0 +1,66 @@
+# tests/test_store.py
+import pytest
+
+from store import RoadmapStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RoadmapStore(str(tmp_path / "pathforge.db"), flush_interval=60.0)
+    yield store
+    store.close()
+
+
+def test_session_round_trip(store):
+    store.save_session("user", "onboarding", goal_type="python", responses={"level": "beginner"},
+                       questions={"fields": []}, profile_hash="hash")
+    assert store.load_session("user") == {
+        "step": "onboarding",
+        "goal_type": "python",
+        "responses": {"level": "beginner"},
+        "questions": {"fields": []},
+        "profile_hash": "hash",
+    }
+    assert store.users_for_profile("hash") == ["user"]
+    assert store.load_session("someone else") is None
+
+
+def test_roadmap_round_trip(store):
+    roadmap = {"milestones": [{"title": "Größen"}]}
+    store.save_roadmap("hash", "python", roadmap)
+    assert store.roadmap("hash") == roadmap
+    assert store.roadmap("missing") is None
+
+
+def test_checkpoints_are_visible_before_and_after_flush(store):
+    store.set_checkpoint("user", "hash", 1, "setup", True)
+    store.set_checkpoint("user", "hash", 1, "setup", False)
+    store.set_checkpoint("user", "hash", 2, "tests", True)
+    expected = {(1, "setup"): False, (2, "tests"): True}
+    assert store.checkpoints("user", "hash") == expected
+    assert store.flush() == 2
+    assert store.flush() == 0
+    assert store.checkpoints("user", "hash") == expected
+
+
+def test_checkpoints_survive_reopening(tmp_path):
+    path = str(tmp_path / "pathforge.db")
+    store = RoadmapStore(path, flush_interval=60.0)
+    store.set_checkpoint("user", "hash", 1, "setup", True)
+    store.close()
+
+    reopened = RoadmapStore(path, flush_interval=60.0)
+    try:
+        assert reopened.checkpoints("user", "hash") == {(1, "setup"): True}
+    finally:
+        reopened.close()
+
+
+def test_delete_session_drops_progress_but_keeps_roadmaps(store):
+    store.save_session("user", "roadmap", profile_hash="hash")
+    store.save_roadmap("hash", "python", {"milestones": []})
+    store.set_checkpoint("user", "hash", 1, "setup", True)
+    store.delete_session("user")
+    assert store.load_session("user") is None
+    assert store.checkpoints("user", "hash") == {}
+    assert store.roadmap("hash") == {"milestones": []}
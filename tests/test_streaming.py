@@ -0,0 +1,18 @@
+# tests/test_streaming.py
+from streaming import IncrementalJSONParser
+
+
+def test_watched_values_are_emitted_as_they_close():
+    parser = IncrementalJSONParser()
+    text = '```json\n{"milestones": [{"title": "Basics"}, {"title": "Projects"}]}'
+    emitted = []
+    for i in range(0, len(text), 7):
+        emitted.extend(parser.feed(text[i:i + 7]))
+    assert emitted == [(("milestones", 0), {"title": "Basics"}), (("milestones", 1), {"title": "Projects"})]
+    assert parser.done
+
+
+def test_raw_control_characters_inside_strings_are_accepted():
+    parser = IncrementalJSONParser()
+    emitted = parser.feed('{"milestones": [{"title": "Line one\nline\ttwo"}]}')
+    assert emitted == [(("milestones", 0), {"title": "Line one\nline\ttwo"})]
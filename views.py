@@ -0,0 +1,108 @@
+# views.py
+import hashlib
+import json
+from typing import Callable, Dict, Optional
+
+import streamlit as st
+
+from models import Milestone, ResearchInsights, Resources, Roadmap
+
+
+def roadmap_digest(roadmap: Roadmap) -> str:
+    canonical = json.dumps(roadmap.to_dict(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def insights_markdown(insights: ResearchInsights) -> str:
+    parts = []
+    if insights.key_concepts:
+        parts.append("**Key Concepts:**\n" + "\n".join(f"- {concept}" for concept in insights.key_concepts))
+    if insights.prerequisites:
+        parts.append("**Prerequisites:**\n" + "\n".join(f"- {prereq}" for prereq in insights.prerequisites))
+    if insights.learning_approach:
+        parts.append(f"**Learning Approach:** {insights.learning_approach}")
+    if insights.estimated_duration:
+        parts.append(f"**Estimated Duration:** {insights.estimated_duration}")
+    return "\n\n".join(parts)
+
+
+def resources_markdown(resources: Resources) -> str:
+    parts = []
+    if resources.courses:
+        parts.append("### Courses\n" + "\n".join(
+            f"- [{course.title}]({course.url}) - {course.duration} ({course.platform})"
+            for course in resources.courses
+        ))
+    if resources.tutorials:
+        parts.append("### Tutorials\n" + "\n".join(
+            f"- [{tutorial.title}]({tutorial.url}) ({tutorial.format})" for tutorial in resources.tutorials
+        ))
+    if resources.documentation:
+        parts.append("### Documentation\n" + "\n".join(
+            f"- [{doc.title}]({doc.url}) ({doc.type})" for doc in resources.documentation
+        ))
+    return "\n\n".join(parts)
+
+
+def milestone_markdown(milestone: Milestone) -> str:
+    """Everything in a milestone expander except its checkpoint widgets."""
+    parts = [f"**Description:** {milestone.description or 'No description available'}"]
+    if milestone.duration:
+        parts.append(f"**Duration:** {milestone.duration}")
+    if milestone.complexity:
+        parts.append(f"**Complexity:** {milestone.complexity}")
+    if milestone.exercises:
+        parts.append("**Exercises:**\n" + "\n".join(
+            f"- **{exercise.title}**: {exercise.description}" for exercise in milestone.exercises
+        ))
+    if milestone.checkpoints:
+        parts.append("**Checkpoints:**")
+    return "\n\n".join(parts)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def roadmap_markdown(digest: str, _roadmap: Roadmap) -> Dict[str, object]:
+    """Markdown for every static part of a roadmap, built once per roadmap digest."""
+    return {
+        "research_insights": insights_markdown(_roadmap.research_insights),
+        "resources": resources_markdown(_roadmap.resources),
+        "milestones": [milestone_markdown(milestone) for milestone in _roadmap.milestones],
+    }
+
+
+def checkpoint_key(number: int, checkpoint: str) -> str:
+    return f"check_{number}_{checkpoint}"
+
+
+@st.fragment
+def milestone_fragment(number: int, milestone: Milestone, body: str,
+                       on_toggle: Optional[Callable[[int, str], None]] = None) -> None:
+    """One milestone; ticking a checkpoint reruns only this fragment.
+
+    on_toggle(number, checkpoint) is called when a checkpoint changes.
+    """
+    with st.expander(f"📍 Milestone {number}: {milestone.title}", expanded=False):
+        st.markdown(body)
+        for checkpoint in milestone.checkpoints:
+            st.checkbox(checkpoint, key=checkpoint_key(number, checkpoint),
+                        on_change=on_toggle, args=(number, checkpoint))
+
+
+def _session_digest(roadmap: Roadmap) -> str:
+    """roadmap_digest, computed once per roadmap object held in this session."""
+    cached = st.session_state.get("_roadmap_digest")
+    if cached is None or cached[0] is not roadmap:
+        cached = st.session_state["_roadmap_digest"] = (roadmap, roadmap_digest(roadmap))
+    return cached[1]
+
+
+def render_roadmap(roadmap: Roadmap, insights_container, resources_container, milestones_container,
+                   on_toggle: Optional[Callable[[int, str], None]] = None) -> None:
+    markdown = roadmap_markdown(_session_digest(roadmap), roadmap)
+    with insights_container:
+        st.markdown(markdown["research_insights"])
+    with resources_container:
+        st.markdown(markdown["resources"])
+    with milestones_container:
+        for number, (milestone, body) in enumerate(zip(roadmap.milestones, markdown["milestones"]), 1):
+            milestone_fragment(number, milestone, body, on_toggle)